@@ -2,23 +2,40 @@ from __future__ import annotations
 
 import asyncio
 import inspect
-import os
-import shutil
-import subprocess
 import sys
 from dataclasses import replace
 from pathlib import Path
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List, Tuple
 
 import flet as ft
 
-from lyricbridge.config import load_config, save_config
-from lyricbridge.models import LyricType, OutputFormat, SearchSource, SearchType, ShowLrcType, Song
-from lyricbridge.providers import NetEaseProvider, QQMusicProvider
-from lyricbridge.services.exporter import export_songs
+from lyricbridge.config import cache_dir, load_config, save_config
+from lyricbridge.dialogs import pick_output_dir, pick_save_path
+from lyricbridge.models import (
+    InputSongId,
+    LyricType,
+    OutputFormat,
+    SearchSource,
+    SearchType,
+    ShowLrcType,
+    Song,
+)
+from lyricbridge.services.cache import CacheKey, LyricsCache
 from lyricbridge.services.lyrics import build_output
 from lyricbridge.utils import InputParseError, format_duration, parse_input_ids, render_filename
 
+if TYPE_CHECKING:
+    # Providers pull in requests and pycryptodome; load them on first use instead.
+    from lyricbridge.providers import NetEaseProvider, QQMusicProvider
+
+
+CONFIG_SAVE_DELAY = 0.5
+PREVIEW_REFRESH_DELAY = 0.15
+PREVIEW_MAX_LINES = 200
+PREFETCH_CONCURRENCY = 8
+LAYOUT_SYNC_DELAY = 0.05
+LAYOUT_MIN_WIDTH_DELTA = 4
+
 
 def main(page: ft.Page) -> None:
     page.title = "lyricbridge"
@@ -32,28 +49,70 @@ def main(page: ft.Page) -> None:
 
     config = load_config()
 
-    providers: Dict[SearchSource, object] = {}
-    lyrics_cache: Dict[str, object] = {}
+    netease_provider: NetEaseProvider | None = None
+    qq_provider: QQMusicProvider | None = None
+    cache_root = cache_dir()
+    lyrics_cache = LyricsCache(cache_root / "lyrics.sqlite3" if cache_root else None)
     current_songs: List[Song] = []
 
-    def refresh_providers() -> None:
-        providers[SearchSource.NETEASE] = NetEaseProvider(config.netease_cookie)
-        providers[SearchSource.QQ] = QQMusicProvider(config.qq_cookie)
+    def get_provider(source: SearchSource) -> NetEaseProvider | QQMusicProvider:
+        # Providers are created on first use; afterwards this is a plain attribute read.
+        nonlocal netease_provider, qq_provider
+        if source is SearchSource.QQ:
+            if qq_provider is None:
+                from lyricbridge.providers import QQMusicProvider
+
+                qq_provider = QQMusicProvider(config.qq_cookie)
+            return qq_provider
+        if netease_provider is None:
+            from lyricbridge.providers import NetEaseProvider
+
+            netease_provider = NetEaseProvider(config.netease_cookie)
+        return netease_provider
+
+    def cache_key(song: Song) -> CacheKey:
+        return (song.source.value, song.song_id, config.prefer_verbatim)
+
+    def derive_output_options() -> Tuple[List[LyricType], OutputFormat, ShowLrcType]:
+        return (
+            [LyricType(t) for t in config.output_lyric_types],
+            OutputFormat(config.output_format),
+            ShowLrcType(config.show_lrc_type),
+        )
 
-    def get_provider(source: SearchSource):
-        if source not in providers:
-            refresh_providers()
-        return providers[source]
+    # Every setting change goes through persist_config, which refreshes this.
+    output_options = derive_output_options()
+    config_save_task = None
+    # Saves go through config.json.tmp, so two writers must never overlap.
+    config_save_lock = asyncio.Lock()
 
-    refresh_providers()
+    async def write_config() -> None:
+        async with config_save_lock:
+            await asyncio.to_thread(save_config, replace(config))
 
-    def cache_key(song: Song) -> str:
-        return f"{song.source.value}:{song.song_id}:{config.prefer_verbatim}"
+    async def flush_config() -> None:
+        nonlocal config_save_task
+        await asyncio.sleep(CONFIG_SAVE_DELAY)
+        config_save_task = None
+        await write_config()
 
     def persist_config() -> None:
-        save_config(config)
+        # Coalesce bursts of setting changes into one write off the UI loop.
+        nonlocal config_save_task, output_options
+        output_options = derive_output_options()
+        if config_save_task is not None:
+            return
+        config_save_task = page.run_task(flush_config)
 
-    def update_song_info(song: Song | None) -> None:
+    async def flush_pending_config() -> None:
+        # On close, skip the remaining delay; the lock also waits out a save in flight.
+        nonlocal config_save_task
+        task, config_save_task = config_save_task, None
+        if task is not None:
+            task.cancel()
+        await write_config()
+
+    def set_song_info(song: Song | None) -> None:
         if song is None:
             singer_field.value = ""
             song_field.value = ""
@@ -62,14 +121,15 @@ def main(page: ft.Page) -> None:
             singer_field.value = ", ".join(song.singers)
             song_field.value = song.name
             album_field.value = song.album
-        singer_field.update()
-        song_field.update()
-        album_field.update()
+
+    def update_song_info(song: Song | None) -> None:
+        set_song_info(song)
+        page.update(singer_field, song_field, album_field)
 
     def show_message(message: str) -> None:
-        update_song_info(None)
+        set_song_info(None)
         preview.value = message
-        preview.update()
+        page.update(singer_field, song_field, album_field, preview)
 
     def show_dialog(title: str, message: str) -> None:
         dialog = ft.AlertDialog(
@@ -82,8 +142,9 @@ def main(page: ft.Page) -> None:
 
     def fetch_lyrics(song: Song):
         key = cache_key(song)
-        if key in lyrics_cache:
-            return lyrics_cache[key]
+        cached = lyrics_cache.get(key)
+        if cached is not None:
+            return cached
 
         provider = get_provider(song.source)
         try:
@@ -94,24 +155,34 @@ def main(page: ft.Page) -> None:
         except Exception:
             return None
 
-        lyrics_cache[key] = lyric
+        lyrics_cache.set(key, lyric)
         return lyric
 
-    def update_preview(song: Song | None) -> None:
-        if song is None:
-            preview.value = ""
-            preview.update()
-            return
+    prefetch_task = None
+
+    def cancel_prefetch() -> None:
+        # Lookups already on a worker thread finish; queued ones are dropped.
+        nonlocal prefetch_task
+        if prefetch_task is not None:
+            prefetch_task.cancel()
+            prefetch_task = None
+
+    async def prefetch_lyrics(songs: List[Song]) -> None:
+        # Cap in-flight requests so a large playlist does not flood the providers.
+        semaphore = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+
+        async def prefetch(song: Song) -> None:
+            async with semaphore:
+                await asyncio.to_thread(fetch_lyrics, song)
 
+        await asyncio.gather(*(prefetch(song) for song in songs))
+
+    def render_preview(song: Song) -> str:
         lyrics = fetch_lyrics(song)
         if not lyrics:
-            preview.value = ""
-            preview.update()
-            return
+            return ""
 
-        lyric_types = [LyricType(t) for t in config.output_lyric_types]
-        output_format = OutputFormat(config.output_format)
-        show_lrc_type = ShowLrcType(config.show_lrc_type)
+        lyric_types, output_format, show_lrc_type = output_options
         outputs = build_output(
             lyrics,
             config,
@@ -119,15 +190,37 @@ def main(page: ft.Page) -> None:
             output_format,
             show_lrc_type,
             config.lrc_merge_separator,
+            max_lines=PREVIEW_MAX_LINES,
         )
-        preview.value = outputs[0].content if outputs else ""
-        preview.update()
+        return outputs[0].content if outputs else ""
+
+    async def update_preview(song: Song | None) -> None:
+        # Fetching and rendering both run off the event loop.
+        value = await asyncio.to_thread(render_preview, song) if song else ""
+        if preview.value != value:
+            preview.value = value
+            preview.update()
+
+    preview_refresh_pending = False
+
+    async def flush_preview() -> None:
+        nonlocal preview_refresh_pending
+        await asyncio.sleep(PREVIEW_REFRESH_DELAY)
+        preview_refresh_pending = False
+        await update_preview(current_songs[0] if current_songs else None)
 
     def refresh_preview() -> None:
-        if not current_songs:
-            update_preview(None)
+        # Rapid dropdown toggling only needs a preview for the final setting.
+        nonlocal preview_refresh_pending
+        if preview_refresh_pending:
             return
-        update_preview(current_songs[0])
+        preview_refresh_pending = True
+        page.run_task(flush_preview)
+
+    def set_busy(busy: bool) -> None:
+        progress_ring.visible = busy
+        search_button.disabled = busy
+        page.update(progress_ring, search_button)
 
     def bind_dropdown(control: ft.Dropdown, handler) -> None:
         if hasattr(control, "on_change"):
@@ -140,188 +233,26 @@ def main(page: ft.Page) -> None:
             return Path(config.last_output_dir)
         return Path.home() / "Downloads"
 
-    def pick_save_path(initial_dir: Path, default_name: str) -> Path | None:
-        if sys.platform.startswith("win"):
-            return _pick_save_path_windows(initial_dir, default_name)
-        if sys.platform == "darwin":
-            return _pick_save_path_macos(initial_dir, default_name)
-        return _pick_save_path_linux(initial_dir, default_name)
-
-    def pick_output_dir(initial_dir: Path) -> Path | None:
-        if sys.platform.startswith("win"):
-            return _pick_output_dir_windows(initial_dir)
-        if sys.platform == "darwin":
-            return _pick_output_dir_macos(initial_dir)
-        return _pick_output_dir_linux(initial_dir)
-
-    def _pick_save_path_linux(initial_dir: Path, default_name: str) -> Path | None:
-        commands: List[List[str]] = []
-        default_base = initial_dir if initial_dir.exists() else Path.home()
-        default_path = default_base / default_name
-        if shutil.which("zenity"):
-            cmd = [
-                "zenity",
-                "--file-selection",
-                "--save",
-                "--confirm-overwrite",
-                "--title=Save lyrics",
-                "--filename",
-                str(default_path),
-            ]
-            commands.append(cmd)
-        if shutil.which("kdialog"):
-            cmd = ["kdialog", "--getsavefilename", str(default_path)]
-            commands.append(cmd)
-
-        if not commands:
-            raise RuntimeError("No file picker available. Install zenity or kdialog.")
-
-        for cmd in commands:
-            try:
-                result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-            except FileNotFoundError:
-                continue
-            if result.returncode == 0:
-                path = result.stdout.strip()
-                return Path(path) if path else None
-            if result.returncode == 1:
-                return None
-
-        raise RuntimeError("Failed to open save dialog.")
-
-    def _pick_save_path_macos(initial_dir: Path, default_name: str) -> Path | None:
-        script = 'choose file name with prompt "Save lyrics"'
-        if initial_dir.exists():
-            safe_dir = str(initial_dir).replace('"', '\\"')
-            script += f' default location POSIX file "{safe_dir}"'
-        if default_name:
-            safe_name = default_name.replace('"', '\\"')
-            script += f' default name "{safe_name}"'
-        script = f"POSIX path of ({script})"
-        try:
-            result = subprocess.run(
-                ["osascript", "-e", script], capture_output=True, text=True, check=False
-            )
-        except FileNotFoundError as exc:
-            raise RuntimeError("osascript not available to pick a file.") from exc
-        if result.returncode == 0:
-            path = result.stdout.strip()
-            return Path(path) if path else None
-        if result.returncode == 1:
-            return None
-        raise RuntimeError("Failed to open save dialog.")
-
-    def _pick_save_path_windows(initial_dir: Path, default_name: str) -> Path | None:
-        initial = str(initial_dir).replace("'", "''") if initial_dir.exists() else ""
-        safe_name = default_name.replace("'", "''")
-        script = (
-            "Add-Type -AssemblyName System.Windows.Forms;"
-            "$f = New-Object System.Windows.Forms.SaveFileDialog;"
-            "$f.Title = 'Save lyrics';"
-            f"$f.InitialDirectory = '{initial}';"
-            f"$f.FileName = '{safe_name}';"
-            "if ($f.ShowDialog() -eq 'OK') { $f.FileName }"
-        )
-        try:
-            result = subprocess.run(
-                ["powershell", "-NoProfile", "-Command", script],
-                capture_output=True,
-                text=True,
-                check=False,
-            )
-        except FileNotFoundError as exc:
-            raise RuntimeError("PowerShell is required to pick a file.") from exc
-        if result.returncode == 0:
-            path = result.stdout.strip()
-            return Path(path) if path else None
-        if result.returncode == 1:
-            return None
-        raise RuntimeError("Failed to open save dialog.")
-
-    def _pick_output_dir_linux(initial_dir: Path) -> Path | None:
-        commands: List[List[str]] = []
-        if shutil.which("zenity"):
-            cmd = ["zenity", "--file-selection", "--directory", "--title=Select output folder"]
-            if initial_dir.exists():
-                cmd += ["--filename", f"{initial_dir}{os.sep}"]
-            commands.append(cmd)
-        if shutil.which("kdialog"):
-            cmd = ["kdialog", "--getexistingdirectory"]
-            if initial_dir.exists():
-                cmd.append(str(initial_dir))
-            commands.append(cmd)
-
-        if not commands:
-            raise RuntimeError("No folder picker available. Install zenity or kdialog.")
-
-        for cmd in commands:
-            try:
-                result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-            except FileNotFoundError:
-                continue
-            if result.returncode == 0:
-                path = result.stdout.strip()
-                return Path(path) if path else None
-            if result.returncode == 1:
-                return None
-
-        raise RuntimeError("Failed to open folder picker.")
-
-    def _pick_output_dir_macos(initial_dir: Path) -> Path | None:
-        script = 'POSIX path of (choose folder with prompt "Select output folder")'
-        if initial_dir.exists():
-            safe_dir = str(initial_dir).replace('"', '\\"')
-            script = (
-                'POSIX path of (choose folder with prompt "Select output folder" '
-                f'default location POSIX file "{safe_dir}")'
-            )
-        try:
-            result = subprocess.run(
-                ["osascript", "-e", script], capture_output=True, text=True, check=False
-            )
-        except FileNotFoundError as exc:
-            raise RuntimeError("osascript not available to pick a folder.") from exc
-        if result.returncode == 0:
-            path = result.stdout.strip()
-            return Path(path) if path else None
-        if result.returncode == 1:
-            return None
-        raise RuntimeError("Failed to open folder picker.")
-
-    def _pick_output_dir_windows(initial_dir: Path) -> Path | None:
-        script = (
-            "Add-Type -AssemblyName System.Windows.Forms;"
-            "$f = New-Object System.Windows.Forms.FolderBrowserDialog;"
-            "$f.Description = 'Select output folder';"
-            "if ($f.ShowDialog() -eq 'OK') { $f.SelectedPath }"
-        )
-        try:
-            result = subprocess.run(
-                ["powershell", "-NoProfile", "-Command", script],
-                capture_output=True,
-                text=True,
-                check=False,
-            )
-        except FileNotFoundError as exc:
-            raise RuntimeError("PowerShell is required to pick a folder.") from exc
-        if result.returncode == 0:
-            path = result.stdout.strip()
-            return Path(path) if path else None
-        if result.returncode == 1:
-            return None
-        raise RuntimeError("Failed to open folder picker.")
-
-    def run_exact_search(_: ft.ControlEvent | None = None) -> None:
+    async def run_exact_search(_: ft.ControlEvent | None = None) -> None:
         search_text = search_input.value.strip()
         if not search_text:
             show_message("Search input is empty.")
             return
 
-        lyrics_cache.clear()
         current_songs.clear()
 
+        set_busy(True)
         try:
-            ids = parse_input_ids(
+            await resolve_songs(search_text)
+        finally:
+            set_busy(False)
+
+    async def resolve_songs(search_text: str) -> None:
+        nonlocal prefetch_task
+        cancel_prefetch()
+        try:
+            ids = await asyncio.to_thread(
+                parse_input_ids,
                 search_text,
                 SearchSource(source_selector.value),
                 SearchType(type_selector.value),
@@ -330,29 +261,65 @@ def main(page: ft.Page) -> None:
             show_message(str(exc))
             return
 
+        providers_by_source = {item.source: get_provider(item.source) for item in ids}
+
+        # Individual songs are looked up with one batch request per source;
+        # albums and playlists still need a request each.
+        song_ids_by_source: Dict[SearchSource, List[str]] = {}
+        collections: List[InputSongId] = []
         for item in ids:
-            provider = get_provider(item.source)
-            try:
-                if item.search_type == SearchType.SONG:
-                    song = provider.get_song(item.song_id)
-                    if song:
-                        current_songs.append(song)
-                elif item.search_type == SearchType.ALBUM:
-                    _, songs = provider.get_album(item.song_id)
-                    current_songs.extend(songs)
-                elif item.search_type == SearchType.PLAYLIST:
-                    _, songs = provider.get_playlist(item.song_id)
-                    current_songs.extend(songs)
-            except Exception as exc:
-                show_message(f"Search failed: {exc}")
+            if item.search_type == SearchType.SONG:
+                song_ids_by_source.setdefault(item.source, []).append(item.song_id)
+            else:
+                collections.append(item)
+
+        def resolve_songs_batch(
+            source: SearchSource, song_ids: List[str]
+        ) -> Dict[str, Song | None]:
+            # get_songs lines up with its input, so key by the id as typed.
+            return dict(zip(song_ids, providers_by_source[source].get_songs(song_ids)))
+
+        def resolve_collection(item: InputSongId) -> List[Song]:
+            provider = providers_by_source[item.source]
+            if item.search_type == SearchType.ALBUM:
+                _, songs = provider.get_album(item.song_id)
+                return songs
+            if item.search_type == SearchType.PLAYLIST:
+                _, songs = provider.get_playlist(item.song_id)
+                return songs
+            return []
+
+        sources = list(song_ids_by_source)
+        results = await asyncio.gather(
+            *(
+                asyncio.to_thread(resolve_songs_batch, source, song_ids_by_source[source])
+                for source in sources
+            ),
+            *(asyncio.to_thread(resolve_collection, item) for item in collections),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                show_message(f"Search failed: {result}")
                 return
 
+        songs_by_source = dict(zip(sources, results))
+        collection_songs = iter(results[len(sources) :])
+        for item in ids:
+            if item.search_type == SearchType.SONG:
+                song = songs_by_source[item.source].get(item.song_id)
+                if song is not None:
+                    current_songs.append(song)
+            else:
+                current_songs.extend(next(collection_songs))
+
         if not current_songs:
             show_message("No songs found.")
             return
 
         update_song_info(current_songs[0])
-        update_preview(current_songs[0])
+        await update_preview(current_songs[0])
+        prefetch_task = page.run_task(prefetch_lyrics, list(current_songs[1:]))
 
     async def run_save(_: ft.ControlEvent) -> None:
         if not current_songs:
@@ -360,7 +327,7 @@ def main(page: ft.Page) -> None:
             return
         initial_dir = default_output_dir()
         output_dir: Path
-        output_config = config
+        filename_format: str | None = None
         if len(current_songs) == 1:
             song = current_songs[0]
             tokens = {
@@ -386,7 +353,7 @@ def main(page: ft.Page) -> None:
                 return
 
             output_dir = selected_path.parent
-            output_config = replace(config, output_filename_format=selected_path.stem)
+            filename_format = selected_path.stem
         else:
             try:
                 selected_dir = await asyncio.to_thread(pick_output_dir, initial_dir)
@@ -401,7 +368,18 @@ def main(page: ft.Page) -> None:
 
         config.last_output_dir = str(output_dir)
         persist_config()
-        exported = export_songs(current_songs, fetch_lyrics, output_dir, output_config, lambda _: None)
+        # The export fetches what it needs itself; stop competing with it.
+        cancel_prefetch()
+        from lyricbridge.services.exporter import export_songs_async
+
+        exported = await export_songs_async(
+            current_songs,
+            fetch_lyrics,
+            output_dir,
+            config,
+            lambda _: None,
+            filename_format_override=filename_format,
+        )
         if not exported:
             show_dialog("Save failed", "No files were exported.")
         else:
@@ -461,6 +439,7 @@ def main(page: ft.Page) -> None:
     album_field = ft.TextField(label="Album", read_only=True, height=44)
 
     lyrics_label = ft.Text("Lyrics")
+    progress_ring = ft.ProgressRing(width=16, height=16, stroke_width=2, visible=False)
     preview = ft.TextField(
         multiline=True,
         read_only=True,
@@ -512,7 +491,7 @@ def main(page: ft.Page) -> None:
     )
 
     lyrics_section = ft.Column(
-        controls=[lyrics_label, preview],
+        controls=[ft.Row([lyrics_label, progress_ring], spacing=8), preview],
         spacing=6,
         horizontal_alignment=ft.CrossAxisAlignment.STRETCH,
     )
@@ -532,11 +511,18 @@ def main(page: ft.Page) -> None:
     )
     page.add(content)
 
+    last_layout_width = 0.0
+    layout_sync_pending = False
+
     def sync_layout() -> None:
+        nonlocal last_layout_width
         page_width = page.width or page.window.width or page.window_width
         if not page_width:
             return
         content_width = max(360, page_width - 32)
+        if abs(content_width - last_layout_width) < LAYOUT_MIN_WIDTH_DELTA:
+            return
+        last_layout_width = content_width
         col_width = (content_width - row_spacing * 2) / 3
 
         for control in (
@@ -554,13 +540,43 @@ def main(page: ft.Page) -> None:
         search_button.width = col_width
         save_button.width = col_width
         search_input.width = col_width * 2 + row_spacing
-        lyrics_label.width = content_width
+        lyrics_label.width = content_width - progress_ring.width - 8
         preview.width = content_width
         page.update()
 
-    page.on_resize = lambda _: sync_layout()
+    async def flush_layout() -> None:
+        nonlocal layout_sync_pending
+        await asyncio.sleep(LAYOUT_SYNC_DELAY)
+        layout_sync_pending = False
+        sync_layout()
+
+    def schedule_layout() -> None:
+        # Window drags fire resize events per pixel; relayout at most every LAYOUT_SYNC_DELAY.
+        nonlocal layout_sync_pending
+        if layout_sync_pending:
+            return
+        layout_sync_pending = True
+        page.run_task(flush_layout)
+
+    page.on_resize = lambda _: schedule_layout()
     sync_layout()
 
+    async def on_window_event(e) -> None:
+        if e.type != ft.WindowEventType.CLOSE:
+            return
+        await flush_pending_config()
+        closed = page.window.destroy()
+        if inspect.isawaitable(closed):
+            await closed
+
+    async def on_disconnect(_) -> None:
+        await flush_pending_config()
+
+    # Hold the window open until a pending config save has been written.
+    page.window.prevent_close = True
+    page.window.on_event = on_window_event
+    page.on_disconnect = on_disconnect
+
 
 def run_app() -> None:
     if hasattr(ft, "run"):
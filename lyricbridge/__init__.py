@@ -1 +1 @@
-__all__ = ["config", "models", "providers", "services", "utils"]
+__all__ = ["config", "dialogs", "fastjson", "models", "net", "providers", "services", "utils"]
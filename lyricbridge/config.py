@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-import json
 from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
+from . import fastjson
 from .models import LyricType, OutputEncoding, OutputFormat, SearchSource, SearchType, ShowLrcType
 
 
@@ -47,13 +47,22 @@ def config_path() -> Path:
     return config_dir / CONFIG_FILE_NAME
 
 
+def cache_dir() -> Optional[Path]:
+    path = Path.home() / ".cache" / CONFIG_DIR_NAME
+    try:
+        path.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return None  # unwritable home; callers fall back to memory-only caching
+    return path
+
+
 def load_config() -> AppConfig:
     path = config_path()
     if not path.exists():
         return AppConfig()
     try:
-        raw = json.loads(path.read_text(encoding="utf-8"))
-    except json.JSONDecodeError:
+        raw = fastjson.loads(path.read_bytes())
+    except ValueError:
         return AppConfig()
 
     default = AppConfig()
@@ -66,4 +75,7 @@ def load_config() -> AppConfig:
 
 def save_config(config: AppConfig) -> None:
     path = config_path()
-    path.write_text(json.dumps(asdict(config), indent=2), encoding="utf-8")
+    # Write beside the target and swap it in so a crash never leaves half a file.
+    tmp_path = path.with_suffix(".json.tmp")
+    tmp_path.write_bytes(fastjson.dumps_indented(asdict(config)))
+    tmp_path.replace(path)
@@ -0,0 +1,373 @@
+from __future__ import annotations
+
+import atexit
+import base64
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List
+
+
+def _pick_save_path_linux(initial_dir: Path, default_name: str) -> Path | None:
+    commands: List[List[str]] = []
+    default_base = initial_dir if initial_dir.exists() else Path.home()
+    default_path = default_base / default_name
+    if shutil.which("zenity"):
+        cmd = [
+            "zenity",
+            "--file-selection",
+            "--save",
+            "--confirm-overwrite",
+            "--title=Save lyrics",
+            "--filename",
+            str(default_path),
+        ]
+        commands.append(cmd)
+    if shutil.which("kdialog"):
+        cmd = ["kdialog", "--getsavefilename", str(default_path)]
+        commands.append(cmd)
+
+    if not commands:
+        raise RuntimeError("No file picker available. Install zenity or kdialog.")
+
+    for cmd in commands:
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, check=False)
+        except FileNotFoundError:
+            continue
+        if result.returncode == 0:
+            path = result.stdout.strip()
+            return Path(path) if path else None
+        if result.returncode == 1:
+            return None
+
+    raise RuntimeError("Failed to open save dialog.")
+
+
+def _pick_save_path_macos(initial_dir: Path, default_name: str) -> Path | None:
+    request = {"kind": "save", "prompt": "Save lyrics", "name": default_name}
+    if initial_dir.exists():
+        request["location"] = str(initial_dir)
+    try:
+        return _run_osascript_dialog(request)
+    except OSError:
+        pass
+
+    script = 'choose file name with prompt "Save lyrics"'
+    if initial_dir.exists():
+        safe_dir = str(initial_dir).replace('"', '\\"')
+        script += f' default location POSIX file "{safe_dir}"'
+    if default_name:
+        safe_name = default_name.replace('"', '\\"')
+        script += f' default name "{safe_name}"'
+    script = f"POSIX path of ({script})"
+    try:
+        result = subprocess.run(
+            ["osascript", "-e", script], capture_output=True, text=True, check=False
+        )
+    except FileNotFoundError as exc:
+        raise RuntimeError("osascript not available to pick a file.") from exc
+    if result.returncode == 0:
+        path = result.stdout.strip()
+        return Path(path) if path else None
+    if result.returncode == 1:
+        return None
+    raise RuntimeError("Failed to open save dialog.")
+
+
+def _pick_save_path_windows(initial_dir: Path, default_name: str) -> Path | None:
+    try:
+        from . import win_dialogs
+
+        return win_dialogs.save_file_dialog(
+            "Save lyrics", initial_dir if initial_dir.exists() else None, default_name
+        )
+    except (ImportError, AttributeError, OSError):
+        pass
+
+    initial = str(initial_dir) if initial_dir.exists() else ""
+    script = (
+        "$f = New-Object System.Windows.Forms.SaveFileDialog;"
+        "$f.Title = 'Save lyrics';"
+        f"$f.InitialDirectory = {_ps_text(initial)};"
+        f"$f.FileName = {_ps_text(default_name)};"
+        f"if ($f.ShowDialog() -eq 'OK') {{ {_ps_output('$f.FileName')} }}"
+    )
+    return _run_powershell_dialog(
+        script, "PowerShell is required to pick a file.", "Failed to open save dialog."
+    )
+
+
+def _pick_output_dir_linux(initial_dir: Path) -> Path | None:
+    commands: List[List[str]] = []
+    if shutil.which("zenity"):
+        cmd = ["zenity", "--file-selection", "--directory", "--title=Select output folder"]
+        if initial_dir.exists():
+            cmd += ["--filename", f"{initial_dir}{os.sep}"]
+        commands.append(cmd)
+    if shutil.which("kdialog"):
+        cmd = ["kdialog", "--getexistingdirectory"]
+        if initial_dir.exists():
+            cmd.append(str(initial_dir))
+        commands.append(cmd)
+
+    if not commands:
+        raise RuntimeError("No folder picker available. Install zenity or kdialog.")
+
+    for cmd in commands:
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, check=False)
+        except FileNotFoundError:
+            continue
+        if result.returncode == 0:
+            path = result.stdout.strip()
+            return Path(path) if path else None
+        if result.returncode == 1:
+            return None
+
+    raise RuntimeError("Failed to open folder picker.")
+
+
+def _pick_output_dir_macos(initial_dir: Path) -> Path | None:
+    request = {"kind": "folder", "prompt": "Select output folder"}
+    if initial_dir.exists():
+        request["location"] = str(initial_dir)
+    try:
+        return _run_osascript_dialog(request)
+    except OSError:
+        pass
+
+    script = 'POSIX path of (choose folder with prompt "Select output folder")'
+    if initial_dir.exists():
+        safe_dir = str(initial_dir).replace('"', '\\"')
+        script = (
+            'POSIX path of (choose folder with prompt "Select output folder" '
+            f'default location POSIX file "{safe_dir}")'
+        )
+    try:
+        result = subprocess.run(
+            ["osascript", "-e", script], capture_output=True, text=True, check=False
+        )
+    except FileNotFoundError as exc:
+        raise RuntimeError("osascript not available to pick a folder.") from exc
+    if result.returncode == 0:
+        path = result.stdout.strip()
+        return Path(path) if path else None
+    if result.returncode == 1:
+        return None
+    raise RuntimeError("Failed to open folder picker.")
+
+
+def _pick_output_dir_windows(initial_dir: Path) -> Path | None:
+    try:
+        from . import win_dialogs
+
+        return win_dialogs.folder_dialog(
+            "Select output folder", initial_dir if initial_dir.exists() else None
+        )
+    except (ImportError, AttributeError, OSError):
+        pass
+
+    script = (
+        "$f = New-Object System.Windows.Forms.FolderBrowserDialog;"
+        "$f.Description = 'Select output folder';"
+        f"if ($f.ShowDialog() -eq 'OK') {{ {_ps_output('$f.SelectedPath')} }}"
+    )
+    return _run_powershell_dialog(
+        script, "PowerShell is required to pick a folder.", "Failed to open folder picker."
+    )
+
+
+class _HostProcess:
+    """Long-lived helper process that serves dialog requests over stdin/stdout.
+
+    Starting PowerShell or osascript costs a noticeable fraction of a second,
+    so the first dialog spawns one process and every later dialog reuses it.
+    """
+
+    def __init__(self, args: List[str], preamble: str = "") -> None:
+        self._args = args
+        self._preamble = preamble
+        self._proc: subprocess.Popen | None = None
+        self._lock = threading.Lock()
+
+    def exchange(self, request: str, is_last: Callable[[str], bool]) -> List[str]:
+        with self._lock:
+            while True:
+                reused = self._proc is not None and self._proc.poll() is None
+                proc = self._ensure_process()
+                lines: List[str] = []
+                try:
+                    proc.stdin.write(request)
+                    proc.stdin.flush()
+                    while True:
+                        line = proc.stdout.readline()
+                        if not line:
+                            raise OSError("Dialog host exited unexpectedly.")
+                        line = line.strip()
+                        lines.append(line)
+                        if is_last(line):
+                            return lines
+                except OSError:
+                    self._close_locked()
+                    # A reused host may have died while idle; start a fresh one
+                    # and resend once, unless it had already begun to answer.
+                    if not reused or lines:
+                        raise
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_locked()
+
+    def _ensure_process(self) -> subprocess.Popen:
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                self._args,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                encoding="utf-8",
+            )
+            if self._preamble:
+                self._proc.stdin.write(self._preamble)
+                self._proc.stdin.flush()
+        return self._proc
+
+    def _close_locked(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+
+
+# Fallback for when the native comdlg32/shell32 dialogs are unavailable.
+# Stop makes every cmdlet error terminating so the request's catch sees it.
+_POWERSHELL_HOST = _HostProcess(
+    ["powershell", "-NoProfile", "-NoLogo", "-Command", "-"],
+    "$ErrorActionPreference = 'Stop'\nAdd-Type -AssemblyName System.Windows.Forms\n",
+)
+PS_ERROR_MARKER = "ERR:"
+atexit.register(_POWERSHELL_HOST.close)
+
+# JXA reads one JSON request per line and answers with one JSON line, written
+# through NSFileHandle so replies are never stuck in a stdio buffer.
+OSASCRIPT_HOST_SCRIPT = """
+ObjC.import('Foundation');
+var app = Application.currentApplication();
+app.includeStandardAdditions = true;
+var input = $.NSFileHandle.fileHandleWithStandardInput;
+var output = $.NSFileHandle.fileHandleWithStandardOutput;
+function reply(value) {
+  var text = $(JSON.stringify(value) + '\\n');
+  output.writeData(text.dataUsingEncoding($.NSUTF8StringEncoding));
+}
+var pending = '';
+while (true) {
+  var data = input.availableData;
+  if (data.length === 0) break;
+  pending += $.NSString.alloc.initWithDataEncoding(data, $.NSUTF8StringEncoding).js;
+  var index;
+  while ((index = pending.indexOf('\\n')) >= 0) {
+    var request = JSON.parse(pending.slice(0, index));
+    pending = pending.slice(index + 1);
+    try {
+      var options = {withPrompt: request.prompt};
+      if (request.location) options.defaultLocation = Path(request.location);
+      var chosen;
+      if (request.kind === 'save') {
+        if (request.name) options.defaultName = request.name;
+        chosen = app.chooseFileName(options);
+      } else {
+        chosen = app.chooseFolder(options);
+      }
+      reply({path: chosen.toString()});
+    } catch (error) {
+      reply(error.errorNumber === -128 ? {path: null} : {error: String(error)});
+    }
+  }
+}
+"""
+
+_OSASCRIPT_HOST = _HostProcess(["osascript", "-l", "JavaScript", "-e", OSASCRIPT_HOST_SCRIPT])
+atexit.register(_OSASCRIPT_HOST.close)
+
+
+def _run_osascript_dialog(request: Dict[str, str]) -> Path | None:
+    lines = _OSASCRIPT_HOST.exchange(
+        json.dumps(request) + "\n", lambda line: line.startswith("{")
+    )
+    try:
+        reply = json.loads(lines[-1])
+    except ValueError as exc:
+        raise OSError("Malformed reply from dialog host.") from exc
+    if "error" in reply:
+        raise OSError(reply["error"])
+    path = reply.get("path")
+    return Path(path) if path else None
+
+
+def _ps_text(value: str) -> str:
+    # Strings cross the pipe as base64 so console code pages cannot mangle them.
+    encoded = base64.b64encode(value.encode("utf-8")).decode("ascii")
+    return f"[Text.Encoding]::UTF8.GetString([Convert]::FromBase64String('{encoded}'))"
+
+
+def _ps_output(expression: str) -> str:
+    return f"[Convert]::ToBase64String([Text.Encoding]::UTF8.GetBytes({expression}))"
+
+
+def _ps_decode(encoded: str) -> str:
+    try:
+        return base64.b64decode(encoded).decode("utf-8")
+    except ValueError:
+        return ""
+
+
+def _run_powershell_dialog(script: str, missing_message: str, failed_message: str) -> Path | None:
+    sentinel = f"__lyricbridge_{uuid.uuid4().hex}__"
+    # stderr is discarded, so script errors come back on stdout behind a marker;
+    # otherwise a failed script would look exactly like a cancelled dialog.
+    request = (
+        f"try {{ {script} }}"
+        f" catch {{ Write-Output ('{PS_ERROR_MARKER}' + {_ps_output('$_.Exception.Message')}) }}"
+        f" finally {{ Write-Output '{sentinel}' }}\n"
+    )
+    try:
+        output = "".join(_POWERSHELL_HOST.exchange(request, lambda line: line == sentinel)[:-1])
+    except FileNotFoundError as exc:
+        raise RuntimeError(missing_message) from exc
+    except OSError as exc:
+        raise RuntimeError(failed_message) from exc
+
+    if output.startswith(PS_ERROR_MARKER):
+        detail = _ps_decode(output[len(PS_ERROR_MARKER) :])
+        raise RuntimeError(f"{failed_message} {detail}".strip())
+    if not output:
+        return None
+    try:
+        path = base64.b64decode(output).decode("utf-8")
+    except ValueError as exc:
+        raise RuntimeError(failed_message) from exc
+    return Path(path) if path else None
+
+
+# The platform cannot change at runtime, so pick the implementations once.
+if sys.platform.startswith("win"):
+    pick_save_path = _pick_save_path_windows
+    pick_output_dir = _pick_output_dir_windows
+elif sys.platform == "darwin":
+    pick_save_path = _pick_save_path_macos
+    pick_output_dir = _pick_output_dir_macos
+else:
+    pick_save_path = _pick_save_path_linux
+    pick_output_dir = _pick_output_dir_linux
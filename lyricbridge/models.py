@@ -1,40 +1,56 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from enum import Enum
+from enum import Enum, EnumMeta
 from typing import Dict, List, Optional
 
 
-class SearchSource(str, Enum):
+class _FastEnumMeta(EnumMeta):
+    # Config values are turned back into enums on every preview and export;
+    # go straight to the value map instead of through Enum.__new__.
+    def __call__(cls, value, *args, **kwargs):
+        if not args and not kwargs:
+            try:
+                return cls._value2member_map_[value]
+            except (KeyError, TypeError):
+                pass
+        return super().__call__(value, *args, **kwargs)
+
+
+class _StrEnum(str, Enum, metaclass=_FastEnumMeta):
+    pass
+
+
+class SearchSource(_StrEnum):
     NETEASE = "netease"
     QQ = "qq"
 
 
-class SearchType(str, Enum):
+class SearchType(_StrEnum):
     SONG = "song"
     ALBUM = "album"
     PLAYLIST = "playlist"
 
 
-class ShowLrcType(str, Enum):
+class ShowLrcType(_StrEnum):
     STAGGER = "stagger"
     MERGE = "merge"
     ISOLATED = "isolated"
 
 
-class OutputFormat(str, Enum):
+class OutputFormat(_StrEnum):
     LRC = "lrc"
     SRT = "srt"
 
 
-class OutputEncoding(str, Enum):
+class OutputEncoding(_StrEnum):
     UTF_8 = "utf-8"
     UTF_8_BOM = "utf-8-sig"
     UTF_16 = "utf-16"
     UTF_32 = "utf-32"
 
 
-class LyricType(str, Enum):
+class LyricType(_StrEnum):
     ORIGINAL = "original"
     TRANSLATED = "translated"
     TRANSLITERATION = "transliteration"
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# Lyric prefetch and export each run up to 8 lookups at once; keep enough
+# pooled keep-alive connections per host that they never reconnect.
+POOL_MAXSIZE = 16
+
+
+def create_session(pool_maxsize: int = POOL_MAXSIZE) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -1,14 +1,14 @@
 from __future__ import annotations
 
 import base64
-import json
-import random
-import string
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Dict, List, Tuple
 
-import requests
-
+from .. import fastjson
 from ..models import Lyrics, SearchResultItem, SearchSource, SearchType, Song
+from ..net import create_session
 
 try:
     from Crypto.Cipher import AES
@@ -26,31 +26,45 @@ MODULUS = (
 NONCE = "0CoJUm6Qyw8W8jud"
 PUBKEY = "010001"
 VI = "0102030405060708"
+BASE_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; WOW64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/63.0.3239.132 Safari/537.36"
+    ),
+    "Referer": "https://music.163.com/",
+}
+# Large playlists are split across a few parallel song/detail requests.
+SONG_DETAIL_CHUNK = 200
+SONG_DETAIL_WORKERS = 5
+PUBKEY_INT = int(PUBKEY, 16)
+MODULUS_INT = int(MODULUS, 16)
+NONCE_KEY = NONCE.encode("utf-8")
+VI_BYTES = VI.encode("utf-8")
 
 
 class NetEaseProvider:
     def __init__(self, cookie: str = "") -> None:
         self._cookie = cookie
-        self._session = requests.Session()
+        cookie = cookie.strip()
+        self._fixed_headers = {**BASE_HEADERS, "Cookie": cookie} if cookie else None
+        self._session = create_session()
         self._secret_key = self._create_secret_key(16)
+        self._secret_key_bytes = self._secret_key.encode("utf-8")
         self._enc_sec_key = self._rsa_encrypt(self._secret_key)
+        # Repeated lookups post identical payloads; skip both AES passes for them.
+        self._encrypt_params = lru_cache(maxsize=256)(self._encrypt_params_uncached)
 
     def _headers(self) -> Dict[str, str]:
-        cookie = self._cookie.strip() or f"NMTID={self._create_secret_key(10)}"
-        return {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; WOW64) AppleWebKit/537.36 "
-                "(KHTML, like Gecko) Chrome/63.0.3239.132 Safari/537.36"
-            ),
-            "Referer": "https://music.163.com/",
-            "Cookie": cookie,
-        }
+        if self._fixed_headers is not None:
+            return self._fixed_headers
+        # Anonymous requests get a fresh NMTID each time, as before.
+        return {**BASE_HEADERS, "Cookie": f"NMTID={self._create_secret_key(10)}"}
 
     def _weapi_post(self, url: str, data: Dict[str, str]) -> Dict:
-        payload = self._prepare(json.dumps(data))
+        payload = self._prepare(fastjson.dumps(data))
         resp = self._session.post(url, data=payload, headers=self._headers(), timeout=15)
         resp.raise_for_status()
-        return json.loads(resp.text)
+        return fastjson.loads(resp.content)
 
     def search(self, keyword: str, search_type: SearchType) -> List[SearchResultItem]:
         type_map = {
@@ -112,23 +126,33 @@ class NetEaseProvider:
 
         return items
 
-    def get_songs(self, song_ids: List[str]) -> List[Song]:
+    def get_songs(self, song_ids: List[str]) -> List[Song | None]:
+        # One entry per requested id, in request order; None where nothing matched.
+        if len(song_ids) <= SONG_DETAIL_CHUNK:
+            return self._get_songs_chunk(song_ids)
+
+        chunks = [
+            song_ids[i : i + SONG_DETAIL_CHUNK] for i in range(0, len(song_ids), SONG_DETAIL_CHUNK)
+        ]
+        with ThreadPoolExecutor(max_workers=min(SONG_DETAIL_WORKERS, len(chunks))) as pool:
+            return [song for songs in pool.map(self._get_songs_chunk, chunks) for song in songs]
+
+    def _get_songs_chunk(self, song_ids: List[str]) -> List[Song | None]:
         if not song_ids:
             return []
 
         payload = {
-            "c": json.dumps([{"id": song_id} for song_id in song_ids]),
+            "c": fastjson.dumps([{"id": song_id} for song_id in song_ids]),
             "csrf_token": "",
         }
         resp = self._weapi_post("https://music.163.com/weapi/v3/song/detail?csrf_token=", payload)
-        songs: List[Song] = []
-        for song in resp.get("songs", []):
-            songs.append(self._to_song(song, song_id=str(song.get("id"))))
-        return songs
+        # The endpoint does not promise request order, drops unknown ids and
+        # echoes ids in canonical form ("0123" comes back as 123).
+        by_id = {song.song_id: song for song in map(self._to_song, resp.get("songs", []))}
+        return [by_id.get(_canonical_song_id(song_id)) for song_id in song_ids]
 
     def get_song(self, song_id: str) -> Song | None:
-        songs = self.get_songs([song_id])
-        return songs[0] if songs else None
+        return self.get_songs([song_id])[0]
 
     def get_album(self, album_id: str) -> Tuple[str, List[Song]]:
         payload = {"csrf_token": ""}
@@ -137,7 +161,7 @@ class NetEaseProvider:
         )
         album = resp.get("album", {})
         album_name = album.get("name", "")
-        songs = [self._to_song(song, song_id=str(song.get("id"))) for song in resp.get("songs", [])]
+        songs = list(map(self._to_song, resp.get("songs", [])))
         return album_name, songs
 
     def get_playlist(self, playlist_id: str) -> Tuple[str, List[Song]]:
@@ -153,7 +177,7 @@ class NetEaseProvider:
         playlist = resp.get("playlist", {})
         playlist_name = playlist.get("name", "")
         track_ids = [str(item.get("id")) for item in playlist.get("trackIds", [])]
-        songs = self.get_songs(track_ids)
+        songs = [song for song in self.get_songs(track_ids) if song is not None]
         return playlist_name, songs
 
     def get_song_link(self, song_id: str) -> str:
@@ -201,43 +225,51 @@ class NetEaseProvider:
 
         return lyrics
 
-    def _to_song(self, raw: Dict, song_id: str) -> Song:
-        artists = [artist.get("name", "") for artist in raw.get("ar", [])]
-        album = raw.get("al", {})
+    @staticmethod
+    def _to_song(raw: Dict) -> Song:
+        # Called once per track of large playlists, so keep lookups to one per field.
+        # display_id is the id the API returned, as it always was for every caller;
+        # matching against what the user typed is get_songs' job.
+        song_id = str(raw.get("id"))
+        album = raw.get("al") or {}
         return Song(
             source=SearchSource.NETEASE,
-            song_id=str(raw.get("id", song_id)),
+            song_id=song_id,
             display_id=song_id,
             name=raw.get("name", ""),
-            singers=artists,
+            singers=[artist.get("name", "") for artist in raw.get("ar") or ()],
             album=album.get("name", ""),
-            duration_ms=int(raw.get("dt", 0)),
+            duration_ms=int(raw.get("dt") or 0),
             pic_url=album.get("picUrl", ""),
         )
 
     @staticmethod
-    def _aes_encrypt(text: str, key: str) -> str:
-        pad = 16 - len(text) % 16
-        text = text + chr(pad) * pad
-        cipher = AES.new(key.encode("utf-8"), AES.MODE_CBC, VI.encode("utf-8"))
-        encrypted = cipher.encrypt(text.encode("utf-8"))
-        return base64.b64encode(encrypted).decode("utf-8")
+    def _aes_encrypt(data: bytes, key: bytes) -> bytes:
+        # PKCS#7 over the encoded bytes, so multi-byte UTF-8 text pads correctly.
+        pad = 16 - len(data) % 16
+        cipher = AES.new(key, AES.MODE_CBC, VI_BYTES)
+        return base64.b64encode(cipher.encrypt(data + bytes((pad,)) * pad))
+
+    def _encrypt_params_uncached(self, raw: str) -> str:
+        params = self._aes_encrypt(raw.encode("utf-8"), NONCE_KEY)
+        params = self._aes_encrypt(params, self._secret_key_bytes)
+        return params.decode("ascii")
 
     def _prepare(self, raw: str) -> Dict[str, str]:
-        params = self._aes_encrypt(raw, NONCE)
-        params = self._aes_encrypt(params, self._secret_key)
-        return {"params": params, "encSecKey": self._enc_sec_key}
+        return {"params": self._encrypt_params(raw), "encSecKey": self._enc_sec_key}
 
     @staticmethod
     def _create_secret_key(length: int) -> str:
-        return "".join(random.choice(string.ascii_letters + string.digits) for _ in range(length))
+        # token_urlsafe yields ~1.3 chars per byte, so the slice always has enough.
+        return secrets.token_urlsafe(length)[:length]
 
     @staticmethod
     def _rsa_encrypt(text: str) -> str:
-        reversed_text = text[::-1]
-        hex_text = reversed_text.encode("utf-8").hex()
-        value = int(hex_text, 16)
-        pubkey = int(PUBKEY, 16)
-        modulus = int(MODULUS, 16)
-        enc = pow(value, pubkey, modulus)
-        return format(enc, "x").zfill(256)
+        value = int.from_bytes(text.encode("utf-8")[::-1], "big")
+        enc = pow(value, PUBKEY_INT, MODULUS_INT)
+        return enc.to_bytes(128, "big").hex()
+
+
+def _canonical_song_id(song_id: str) -> str:
+    song_id = song_id.strip()
+    return str(int(song_id)) if song_id.isdecimal() else song_id
@@ -1,15 +1,22 @@
 from __future__ import annotations
 
-import json
 import random
 import re
-import string
+import xml.etree.ElementTree as ET
 import zlib
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple
 
 import requests
 
+from .. import fastjson
 from ..models import Lyrics, SearchResultItem, SearchSource, SearchType, Song
+from ..net import create_session
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # pragma: no cover - optional speedup
+    lxml_etree = None
 
 try:
     from Crypto.Cipher import DES3
@@ -18,33 +25,59 @@ except ImportError as exc:  # pragma: no cover - runtime dependency guard
 
 
 QQ_KEY = b"!@#)(*$%123ZXC!@!@#)(NHL"
+# Parallel single-song lookups for ids the batch call missed; kept low for rate limits.
+SONG_FALLBACK_WORKERS = 10
+# The lyric envelope is a few flat elements holding hex text; regexes read it
+# without building a tree, and anything unusual falls back to ElementTree.
+LYRIC_TAG_RE = re.compile(
+    r"<(content|contentts|contentroma|Lyric_1)\b[^>]*?(?:/>|>(.*?)</\1\s*>)", re.S
+)
+LYRIC_1_RE = re.compile(r"<Lyric_1((?:\s+[\w:.-]+\s*=\s*(?:\"[^\"]*\"|'[^']*'))*)\s*/?>")
+LYRIC_CONTENT_ATTR_RE = re.compile(r"\sLyricContent\s*=\s*(?:\"([^\"]*)\"|'([^']*)')")
+XML_REF_RE = re.compile(r"&(?:#x([0-9a-fA-F]+)|#([0-9]+)|(amp|lt|gt|quot|apos));")
+XML_ENTITIES = {"amp": "&", "lt": "<", "gt": ">", "quot": '"', "apos": "'"}
+# Literal characters outside the XML Char production make the document malformed.
+XML_ILLEGAL_CHAR_RE = re.compile("[^\t\n\r\x20-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]")
+# XML attribute normalisation turns literal line breaks and tabs into spaces.
+ATTR_WHITESPACE_RE = re.compile(r"\r\n|[\r\n\t]")
+# libxml2 parses the fallback path faster; entities stay unresolved and the
+# explicit encoding overrides whatever the (already decoded) text declares.
+LXML_PARSER = (
+    lxml_etree.XMLParser(encoding="utf-8", resolve_entities=False, no_network=True)
+    if lxml_etree is not None
+    else None
+)
+BASE_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; WOW64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/63.0.3239.132 Safari/537.36"
+    ),
+    "Referer": "https://c.y.qq.com/",
+}
 
 
 class QQMusicProvider:
     def __init__(self, cookie: str = "") -> None:
         self._cookie = cookie
-        self._session = requests.Session()
-
-    def _headers(self) -> Dict[str, str]:
-        return {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; WOW64) AppleWebKit/537.36 "
-                "(KHTML, like Gecko) Chrome/63.0.3239.132 Safari/537.36"
-            ),
-            "Referer": "https://c.y.qq.com/",
-            "Cookie": self._cookie,
-        }
+        self._session = create_session()
+        # The cookie is fixed for the provider's lifetime, so build the headers once.
+        self._headers = {**BASE_HEADERS, "Cookie": cookie}
 
     def _post_json(self, url: str, data: Dict) -> Dict:
-        resp = self._session.post(url, json=data, headers=self._headers(), timeout=15)
+        resp = self._session.post(url, json=data, headers=self._headers, timeout=15)
         resp.raise_for_status()
-        return resp.json()
+        return fastjson.loads(resp.content)
 
     def _post_form(self, url: str, data: Dict[str, str]) -> str:
-        resp = self._session.post(url, data=data, headers=self._headers(), timeout=15)
+        resp = self._session.post(url, data=data, headers=self._headers, timeout=15)
         resp.raise_for_status()
         return resp.text
 
+    def _post_form_json(self, url: str, data: Dict[str, str]) -> Dict:
+        resp = self._session.post(url, data=data, headers=self._headers, timeout=15)
+        resp.raise_for_status()
+        return fastjson.loads(resp.content)
+
     def search(self, keyword: str, search_type: SearchType) -> List[SearchResultItem]:
         type_map = {SearchType.SONG: 0, SearchType.ALBUM: 2, SearchType.PLAYLIST: 3}
         data = {
@@ -106,8 +139,9 @@ class QQMusicProvider:
 
     def get_album(self, album_id: str) -> Tuple[str, List[Song]]:
         data = {"albumid" if album_id.isdigit() else "albummid": album_id}
-        raw = self._post_form("https://c.y.qq.com/v8/fcg-bin/fcg_v8_album_info_cp.fcg", data)
-        resp = json.loads(raw)
+        resp = self._post_form_json(
+            "https://c.y.qq.com/v8/fcg-bin/fcg_v8_album_info_cp.fcg", data
+        )
         album = resp.get("data", {})
         album_name = album.get("name", "")
         songs: List[Song] = []
@@ -126,8 +160,9 @@ class QQMusicProvider:
             "onlysong": "0",
             "new_format": "1",
         }
-        raw = self._post_form("https://c.y.qq.com/qzone/fcg-bin/fcg_ucc_getcdinfo_byids_cp.fcg", data)
-        resp = json.loads(raw)
+        resp = self._post_form_json(
+            "https://c.y.qq.com/qzone/fcg-bin/fcg_ucc_getcdinfo_byids_cp.fcg", data
+        )
         cdlist = resp.get("cdlist", [])
         if not cdlist:
             return "", []
@@ -160,13 +195,58 @@ class QQMusicProvider:
         if not payload:
             return None
 
-        resp = json.loads(payload)
+        resp = fastjson.loads(payload)
         if resp.get("code") != 0 or not resp.get("data"):
             return None
 
         song = resp.get("data", [])[0]
         return self._song_from_song(song)
 
+    def get_songs(self, song_ids: List[str]) -> List[Song | None]:
+        if not song_ids:
+            return []
+
+        # One musicu.fcg call resolves every id and mid; anything it misses
+        # falls back to the single-song endpoint below. The result lines up
+        # with song_ids, holding None for ids neither lookup found.
+        numeric_ids = [int(song_id) for song_id in song_ids if song_id.isdigit()]
+        mids = [song_id for song_id in song_ids if not song_id.isdigit()]
+        data: Dict = {"comm": {"uin": 0, "format": "json", "ct": 24, "cv": 0}}
+        if numeric_ids:
+            data["req_ids"] = self._track_info_request(
+                {"ids": numeric_ids, "types": [0] * len(numeric_ids)}
+            )
+        if mids:
+            data["req_mids"] = self._track_info_request({"mids": mids, "types": [0] * len(mids)})
+        try:
+            resp = self._post_json("https://u.y.qq.com/cgi-bin/musicu.fcg", data)
+        except (requests.RequestException, ValueError):
+            resp = {}
+
+        by_key: Dict[str, Song] = {}
+        for req in ("req_ids", "req_mids"):
+            for track in resp.get(req, {}).get("data", {}).get("tracks", []) or []:
+                song = self._song_from_song(track)
+                by_key[song.song_id] = song
+                by_key[song.display_id] = song
+
+        missing = list(dict.fromkeys(song_id for song_id in song_ids if song_id not in by_key))
+        if missing:
+            workers = min(SONG_FALLBACK_WORKERS, len(missing))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for song_id, song in zip(missing, pool.map(self._get_song_or_none, missing)):
+                    if song is not None:
+                        by_key[song_id] = song
+
+        return [by_key.get(song_id) for song_id in song_ids]
+
+    def _get_song_or_none(self, song_id: str) -> Song | None:
+        # A bad id in the fallback must not sink the rest of the batch.
+        try:
+            return self.get_song(song_id)
+        except (requests.RequestException, ValueError):
+            return None
+
     def get_song_link(self, song_mid: str) -> str:
         guid = self._rand_guid()
         data = {
@@ -216,18 +296,29 @@ class QQMusicProvider:
 
         return lyrics
 
+    @staticmethod
+    def _track_info_request(param: Dict) -> Dict:
+        return {
+            "module": "music.trackInfo.UniformRuleCtrl",
+            "method": "CgiGetTrackInfo",
+            "param": param,
+        }
+
     @staticmethod
     def _strip_jsonp(raw: str, callback: str) -> str:
         if not raw.startswith(callback):
             return ""
-        payload = raw.replace(f"{callback}(", "")
-        if payload.endswith(")"):
-            payload = payload[:-1]
-        return payload
+        # Slice the wrapper off instead of rescanning the body with replace().
+        start = len(callback)
+        if raw.startswith("(", start):
+            start += 1
+        end = len(raw) - 1 if raw.endswith(")") and len(raw) > start else len(raw)
+        return raw[start:end]
 
     @staticmethod
     def _rand_guid(length: int = 10) -> str:
-        return "".join(random.choice(string.digits) for _ in range(length))
+        # One draw zero-padded to width gives the same uniform digit string.
+        return f"{random.randrange(10**length):0{length}d}"
 
     @staticmethod
     def _song_from_song(song: Dict) -> Song:
@@ -275,27 +366,39 @@ class QQMusicProvider:
         )
 
     def _parse_lyric_xml(self, raw: str) -> Dict[str, str]:
-        import xml.etree.ElementTree as ET
+        bodies: Dict[str, str | None] = {}
+        for match in LYRIC_TAG_RE.finditer(raw):
+            tag, body = match.groups()
+            if body and ("<" in body or "&" in body):
+                # CDATA, nested markup or entities: let a real parser decide.
+                return self._parse_lyric_xml_tree(raw)
+            bodies.setdefault(tag, body)
 
         text_map: Dict[str, str] = {}
-        try:
-            root = ET.fromstring(raw)
-        except ET.ParseError:
+        for tag in ("content", "contentts", "contentroma", "Lyric_1"):
+            self._add_lyric(text_map, tag, bodies.get(tag))
+        return text_map
+
+    def _parse_lyric_xml_tree(self, raw: str) -> Dict[str, str]:
+        text_map: Dict[str, str] = {}
+        root = _parse_xml(raw)
+        if root is None:
             return text_map
 
         for tag in ("content", "contentts", "contentroma", "Lyric_1"):
             elem = root.find(f".//{tag}")
-            if elem is None or not elem.text:
-                continue
-            decrypted = self._decrypt_lyric(elem.text)
-            if not decrypted:
-                continue
-            parsed = self._extract_lyric_content(decrypted)
-            key = "lyric" if tag == "Lyric_1" else tag
-            text_map[key] = parsed
-
+            self._add_lyric(text_map, tag, elem.text if elem is not None else None)
         return text_map
 
+    def _add_lyric(self, text_map: Dict[str, str], tag: str, hex_text: str | None) -> None:
+        if not hex_text:
+            return
+        decrypted = self._decrypt_lyric(hex_text)
+        if not decrypted:
+            return
+        key = "lyric" if tag == "Lyric_1" else tag
+        text_map[key] = self._extract_lyric_content(decrypted)
+
     @staticmethod
     def _decrypt_lyric(hex_text: str) -> str:
         raw = bytes.fromhex(hex_text)
@@ -303,30 +406,50 @@ class QQMusicProvider:
             key = DES3.adjust_key_parity(QQ_KEY)
         except ValueError:
             key = QQ_KEY
-        cipher = DES3.new(key, DES3.MODE_ECB)
-        decrypted = bytearray()
-        for i in range(0, len(raw), 8):
-            decrypted.extend(cipher.decrypt(raw[i : i + 8]))
-
-        for wbits in (zlib.MAX_WBITS, -zlib.MAX_WBITS):
-            try:
-                data = zlib.decompress(bytes(decrypted), wbits)
-                return data.decode("utf-8", errors="ignore")
-            except zlib.error:
-                continue
-
-        return ""
+        # ECB blocks are independent, so the whole buffer decrypts in one call;
+        # only a misaligned tail needs a padded copy.
+        if len(raw) % 8:
+            raw += b"\x00" * (-len(raw) % 8)
+        decrypted = DES3.new(key, DES3.MODE_ECB).decrypt(raw)
+
+        # A zlib stream announces itself with a 0x78 header byte; anything else
+        # is treated as raw deflate, so only one decompression is attempted.
+        wbits = zlib.MAX_WBITS if decrypted[:1] == b"\x78" else -zlib.MAX_WBITS
+        try:
+            return zlib.decompress(decrypted, wbits).decode("utf-8", errors="ignore")
+        except zlib.error:
+            return ""
 
     @staticmethod
     def _extract_lyric_content(text: str) -> str:
-        if "<?xml" not in text:
+        if "<?xml" not in text or "<Lyric_1" not in text:
             return text
 
-        import xml.etree.ElementTree as ET
+        element = LYRIC_1_RE.search(text)
+        if element is None:
+            return QQMusicProvider._extract_lyric_content_tree(text)
+        attr = LYRIC_CONTENT_ATTR_RE.search(element.group(1))
+        if attr is None:
+            return text
+        value = attr.group(1) if attr.group(1) is not None else attr.group(2)
+        if (
+            "<" in value
+            or "&" in XML_REF_RE.sub("", value)
+            or XML_ILLEGAL_CHAR_RE.search(value)
+        ):
+            return text  # not well-formed; ElementTree would reject it too
+        value = ATTR_WHITESPACE_RE.sub(" ", value)
+        if "&" in value:
+            try:
+                value = XML_REF_RE.sub(_resolve_xml_ref, value)
+            except ValueError:
+                return text  # illegal character reference; ElementTree rejects it too
+        return value or text
 
-        try:
-            root = ET.fromstring(text)
-        except ET.ParseError:
+    @staticmethod
+    def _extract_lyric_content_tree(text: str) -> str:
+        root = _parse_xml(text)
+        if root is None:
             return text
 
         lyric = root.find(".//Lyric_1")
@@ -334,3 +457,36 @@ class QQMusicProvider:
             return lyric.attrib["LyricContent"]
 
         return text
+
+
+def _parse_xml(text: str):
+    """Parse with lxml when installed, else ElementTree; None if malformed."""
+    if LXML_PARSER is not None:
+        try:
+            return lxml_etree.fromstring(text.encode("utf-8"), LXML_PARSER)
+        except lxml_etree.XMLSyntaxError:
+            return None
+    try:
+        return ET.fromstring(text)
+    except ET.ParseError:
+        return None
+
+
+def _resolve_xml_ref(match: re.Match) -> str:
+    hex_code, dec_code, name = match.groups()
+    if name:
+        return XML_ENTITIES[name]
+    code = int(hex_code, 16) if hex_code else int(dec_code)
+    if not _is_xml_char(code):
+        raise ValueError(f"character reference outside the XML Char range: {match.group()}")
+    return chr(code)
+
+
+def _is_xml_char(code: int) -> bool:
+    # The XML 1.0 Char production.
+    return (
+        code in (0x9, 0xA, 0xD)
+        or 0x20 <= code <= 0xD7FF
+        or 0xE000 <= code <= 0xFFFD
+        or 0x10000 <= code <= 0x10FFFF
+    )
@@ -1,4 +1,19 @@
-from .exporter import export_songs
-from .lyrics import build_output
+from importlib import import_module
 
-__all__ = ["export_songs", "build_output"]
+__all__ = ["LyricsCache", "export_songs", "export_songs_async", "build_output"]
+
+# Submodules are loaded on first attribute access so importing the cache at
+# startup does not drag in the exporter and its translator dependencies.
+_EXPORTS = {
+    "LyricsCache": ".cache",
+    "export_songs": ".exporter",
+    "export_songs_async": ".exporter",
+    "build_output": ".lyrics",
+}
+
+
+def __getattr__(name: str):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(module_name, __name__), name)
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .. import fastjson
+from ..models import Lyrics, SearchSource
+
+
+DEFAULT_TTL_SECONDS = 30 * 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 5000
+
+# (source, song id, prefer verbatim); only flattened to text for the disk store.
+CacheKey = Tuple[str, str, bool]
+
+
+class LyricsCache:
+    """In-memory lyric cache backed by a SQLite file that survives restarts.
+
+    Lookups hit the dict first and fall back to disk; entries older than the
+    TTL are ignored, and the table is trimmed to ``max_entries`` on startup.
+    If ``path`` is None or the database cannot be opened the cache silently
+    stays memory-only.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path],
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self._memory: Dict[CacheKey, Lyrics] = {}
+        self._lock = threading.Lock()
+        self._ttl_seconds = ttl_seconds
+        self._conn: Optional[sqlite3.Connection] = None
+        if path is None:
+            return
+        try:
+            self._conn = sqlite3.connect(str(path), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS lyrics ("
+                "key TEXT PRIMARY KEY, payload TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+            self._prune(max_entries)
+        except sqlite3.Error:
+            self._conn = None
+
+    def get(self, key: CacheKey) -> Optional[Lyrics]:
+        with self._lock:
+            lyrics = self._memory.get(key)
+            if lyrics is not None or self._conn is None:
+                return lyrics
+            try:
+                row = self._conn.execute(
+                    "SELECT payload FROM lyrics WHERE key = ? AND fetched_at >= ?",
+                    (_disk_key(key), time.time() - self._ttl_seconds),
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+            if row is None:
+                return None
+            lyrics = _decode(row[0])
+            if lyrics is not None:
+                self._memory[key] = lyrics
+            return lyrics
+
+    def set(self, key: CacheKey, lyrics: Lyrics) -> None:
+        with self._lock:
+            self._memory[key] = lyrics
+            # Empty results are usually transient failures; keep them out of the disk store.
+            if self._conn is None or not _has_content(lyrics):
+                return
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO lyrics (key, payload, fetched_at) VALUES (?, ?, ?)",
+                        (_disk_key(key), _encode(lyrics), time.time()),
+                    )
+            except sqlite3.Error:
+                pass
+
+    def _prune(self, max_entries: int) -> None:
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM lyrics WHERE fetched_at < ?",
+                (time.time() - self._ttl_seconds,),
+            )
+            self._conn.execute(
+                "DELETE FROM lyrics WHERE key IN "
+                "(SELECT key FROM lyrics ORDER BY fetched_at DESC LIMIT -1 OFFSET ?)",
+                (max_entries,),
+            )
+
+
+def _disk_key(key: CacheKey) -> str:
+    source, song_id, prefer_verbatim = key
+    return f"{source}:{song_id}:{prefer_verbatim}"
+
+
+def _has_content(lyrics: Lyrics) -> bool:
+    return any(
+        (lyrics.original, lyrics.translated, lyrics.transliteration, lyrics.verbatim, lyrics.pinyin)
+    )
+
+
+def _encode(lyrics: Lyrics) -> str:
+    data = asdict(lyrics)
+    data["source"] = lyrics.source.value
+    return fastjson.dumps(data)
+
+
+def _decode(payload: str) -> Optional[Lyrics]:
+    try:
+        data = fastjson.loads(payload)
+        data["source"] = SearchSource(data["source"])
+        return Lyrics(**data)
+    except (ValueError, KeyError, TypeError):
+        return None
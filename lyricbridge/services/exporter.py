@@ -1,13 +1,23 @@
 from __future__ import annotations
 
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 from pathlib import Path
-from typing import Callable, Iterable, List
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 from ..config import AppConfig
-from ..models import LyricType, OutputFormat, ShowLrcType, Song, Lyrics
-from ..utils import format_duration, render_filename
+from ..models import LyricType, Lyrics, OutputFormat, OutputPayload, ShowLrcType, Song
+from ..utils import compile_filename_template, format_duration
 from .lyrics import build_output, parse_lrc, format_timestamp
-from .translators import get_translator
+from .translators import BaseTranslator, get_translator
+
+
+EXPORT_CONCURRENCY = 8
+EXPORT_QUEUE_SIZE = 16
+
+RenderOptions = Tuple[List[LyricType], OutputFormat, ShowLrcType]
 
 
 def export_songs(
@@ -16,56 +26,188 @@ def export_songs(
     output_dir: Path,
     config: AppConfig,
     log: Callable[[str], None],
+    *,
+    filename_format_override: str | None = None,
 ) -> List[Path]:
-    output_dir.mkdir(parents=True, exist_ok=True)
+    translator, options, render_name = _prepare_export(
+        output_dir, config, filename_format_override
+    )
     exported: List[Path] = []
-    translator = get_translator(config) if config.auto_translate_missing else None
 
-    lyric_types = [LyricType(t) for t in config.output_lyric_types]
-    output_format = OutputFormat(config.output_format)
-    show_lrc_type = ShowLrcType(config.show_lrc_type)
+    songs = list(songs)
+    # Lookups and translations are network-bound, so they overlap on worker
+    # threads; map() yields in input order, keeping writes deterministic.
+    with ThreadPoolExecutor(max_workers=EXPORT_CONCURRENCY) as pool:
+        loaded = pool.map(
+            lambda song: _load_lyrics(song, lyrics_lookup, config, translator, log), songs
+        )
+        for index, (song, lyrics) in enumerate(zip(songs, loaded), start=1):
+            if lyrics is None:
+                continue
+            exported.extend(
+                _render_and_write_song(
+                    index, song, lyrics, output_dir, config, options, render_name, log
+                )
+            )
+
+    return exported
 
-    for index, song in enumerate(songs, start=1):
-        lyrics = lyrics_lookup(song)
-        if lyrics is None:
-            log(f"Skip {song.name}: lyric fetch failed")
-            continue
 
-        if config.auto_translate_missing and translator:
+async def export_songs_async(
+    songs: Iterable[Song],
+    lyrics_lookup: Callable[[Song], Lyrics | None],
+    output_dir: Path,
+    config: AppConfig,
+    log: Callable[[str], None],
+    concurrency: int = EXPORT_CONCURRENCY,
+    *,
+    filename_format_override: str | None = None,
+) -> List[Path]:
+    """Pipelined variant of :func:`export_songs`.
+
+    Lyric lookups run concurrently on worker threads (bounded by
+    ``concurrency``) and feed a bounded queue; rendering and writing drain
+    the queue as songs arrive. The returned paths keep input order.
+    """
+    songs = list(songs)
+    translator, options, render_name = await asyncio.to_thread(
+        _prepare_export, output_dir, config, filename_format_override
+    )
+
+    semaphore = asyncio.Semaphore(concurrency)
+    queue: asyncio.Queue[Tuple[int, Song, Lyrics | None]] = asyncio.Queue(maxsize=EXPORT_QUEUE_SIZE)
+
+    async def fetch(index: int, song: Song) -> None:
+        async with semaphore:
             try:
-                lyrics = _apply_translation(lyrics, config, translator)
+                lyrics = await asyncio.to_thread(
+                    _load_lyrics, song, lyrics_lookup, config, translator, log
+                )
             except Exception as exc:
-                log(f"Translation failed for {song.name}: {exc}")
-
-        outputs = build_output(
-            lyrics,
-            config,
-            lyric_types,
-            output_format,
-            show_lrc_type,
-            config.lrc_merge_separator,
-        )
+                log(f"Skip {song.name}: {exc}")
+                lyrics = None
+        await queue.put((index, song, lyrics))
+
+    fetchers = [asyncio.create_task(fetch(index, song)) for index, song in enumerate(songs, start=1)]
+    written: Dict[int, List[Path]] = {}
+    try:
+        for _ in range(len(songs)):
+            index, song, lyrics = await queue.get()
+            if lyrics is None:
+                continue
+            # Render and write in one worker hop so neither runs on the event loop.
+            written[index] = await asyncio.to_thread(
+                _render_and_write_song,
+                index,
+                song,
+                lyrics,
+                output_dir,
+                config,
+                options,
+                render_name,
+                log,
+            )
+    finally:
+        for task in fetchers:
+            task.cancel()
+
+    return [path for index in sorted(written) for path in written[index]]
+
+
+def _prepare_export(
+    output_dir: Path,
+    config: AppConfig,
+    filename_format_override: str | None,
+) -> Tuple[Optional[BaseTranslator], RenderOptions, Callable[[Dict[str, str]], str]]:
+    """Shared setup for both exporters: output dir, translator, render options."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    translator = get_translator(config) if config.auto_translate_missing else None
+    options = (
+        [LyricType(t) for t in config.output_lyric_types],
+        OutputFormat(config.output_format),
+        ShowLrcType(config.show_lrc_type),
+    )
+    render_name = compile_filename_template(
+        filename_format_override or config.output_filename_format
+    )
+    return translator, options, render_name
+
+
+def _load_lyrics(
+    song: Song,
+    lyrics_lookup: Callable[[Song], Lyrics | None],
+    config: AppConfig,
+    translator,
+    log: Callable[[str], None],
+) -> Lyrics | None:
+    lyrics = lyrics_lookup(song)
+    if lyrics is None:
+        log(f"Skip {song.name}: lyric fetch failed")
+        return None
+
+    if config.auto_translate_missing and translator:
+        try:
+            lyrics = _apply_translation(lyrics, config, translator)
+        except Exception as exc:
+            log(f"Translation failed for {song.name}: {exc}")
+    return lyrics
 
-        tokens = {
-            "index": str(index),
-            "id": song.display_id,
-            "name": song.name,
-            "singer": config.singer_separator.join(song.singers),
-            "album": song.album,
-            "duration": format_duration(song.duration_ms),
-        }
-        base_name = render_filename(config.output_filename_format, tokens)
-
-        for payload in outputs:
-            suffix = f"_{payload.suffix}" if payload.suffix else ""
-            filename = f"{base_name}{suffix}.{payload.extension}"
-            path = output_dir / filename
-            path.write_text(payload.content, encoding=payload.encoding)
-            exported.append(path)
-
-        log(f"Saved {song.name} ({song.display_id})")
 
-    return exported
+def _render_and_write_song(
+    index: int,
+    song: Song,
+    lyrics: Lyrics,
+    output_dir: Path,
+    config: AppConfig,
+    options: RenderOptions,
+    render_name: Callable[[Dict[str, str]], str],
+    log: Callable[[str], None],
+) -> List[Path]:
+    lyric_types, output_format, show_lrc_type = options
+    outputs = build_output(
+        lyrics,
+        config,
+        lyric_types,
+        output_format,
+        show_lrc_type,
+        config.lrc_merge_separator,
+    )
+    return _write_song(index, song, outputs, output_dir, config, render_name, log)
+
+
+def _write_song(
+    index: int,
+    song: Song,
+    outputs: List[OutputPayload],
+    output_dir: Path,
+    config: AppConfig,
+    render_name: Callable[[Dict[str, str]], str],
+    log: Callable[[str], None],
+) -> List[Path]:
+    tokens = {
+        "index": str(index),
+        "id": song.display_id,
+        "name": song.name,
+        "singer": config.singer_separator.join(song.singers),
+        "album": song.album,
+        "duration": format_duration(song.duration_ms),
+    }
+    base_name = render_name(tokens)
+
+    paths: List[Path] = []
+    for payload in outputs:
+        suffix = f"_{payload.suffix}" if payload.suffix else ""
+        filename = f"{base_name}{suffix}.{payload.extension}"
+        path = output_dir / filename
+        content = payload.content
+        if os.linesep != "\n":
+            # Match text-mode output: files keep the platform line endings.
+            content = content.replace("\n", os.linesep)
+        path.write_bytes(content.encode(payload.encoding))
+        paths.append(path)
+
+    log(f"Saved {song.name} ({song.display_id})")
+    return paths
 
 
 def _apply_translation(lyrics, config: AppConfig, translator) -> any:
@@ -81,5 +223,5 @@ def _apply_translation(lyrics, config: AppConfig, translator) -> any:
     for line, text in zip(lines, translated):
         timestamp = format_timestamp(line.timestamp_ms, config.lrc_timestamp_format)
         lrc_lines.append(f"{timestamp}{text}")
-    lyrics.translated = "\n".join(lrc_lines)
-    return lyrics
+    # Return a copy: the lyrics object may be shared with the session cache.
+    return replace(lyrics, translated="\n".join(lrc_lines))
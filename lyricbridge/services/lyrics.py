@@ -1,90 +1,197 @@
 from __future__ import annotations
 
 import re
-from typing import Dict, Iterable, List, Tuple
+from dataclasses import dataclass
+from functools import lru_cache
+from heapq import merge
+from itertools import groupby
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 from ..config import AppConfig
 from ..models import LyricLine, LyricType, Lyrics, OutputFormat, OutputPayload, ShowLrcType
 
-try:
-    from pypinyin import lazy_pinyin  # type: ignore
-except ImportError:  # pragma: no cover - optional dependency
-    lazy_pinyin = None
-
 
 TIMESTAMP_RE = re.compile(r"\[(\d{1,2}):(\d{1,2})(?:\.(\d{1,3}))?\]")
+# A run of timestamps at the start of a line, the layout nearly every LRC uses.
+LEADING_TIMESTAMPS_RE = re.compile(r"(?:\[\d{1,2}:\d{1,2}(?:\.\d{1,3})?\])+")
+# Word-timed lines: NetEase yrc "[start,dur](start,dur,0)word..." and QQ QRC
+# "[start,dur]word(start,dur)...", both in milliseconds.
+WORD_TIMED_LINE_RE = re.compile(r"\[(\d+),\d+\]")
+WORD_TIMING_RE = re.compile(r"\(\d+,\d+(?:,\d+)?\)")
+# Joins lines for a single pypinyin call; a control character never in lyrics.
+PINYIN_SENTINEL = "\x01"
+TIMESTAMP_FORMAT_RE = re.compile(r"HH|mm|ss|SSS|SS|S")
+
+# Rendered outputs kept for repeat exports and preview refreshes of the same song.
+RENDER_CACHE_SIZE = 256
+
+# Positional fields passed to the compiled template by format_timestamp.
+_TIMESTAMP_FIELDS = {
+    "HH": "{0:02d}",
+    "mm": "{1:02d}",
+    "ss": "{2:02d}",
+    "SSS": "{3:03d}",
+    "SS": "{4:02d}",
+    "S": "{5:d}",
+}
+
+# TIMESTAMP_RE only captures 1-2 digit minutes/seconds and 1-3 digit fractions,
+# so every ASCII group maps through a table instead of int().
+_CLOCK_DIGITS = {f"{i:0{width}d}": i for width in (1, 2) for i in range(100)}
+_FRACTION_MS = {
+    f"{i:0{width}d}": int(f"{i:0{width}d}".ljust(3, "0"))
+    for width in (1, 2, 3)
+    for i in range(10**width)
+}
+
+
+# Parsed lyrics as parallel columns: ascending timestamps and their texts.
+LyricColumns = Tuple[List[int], List[str]]
 
 
 def parse_lrc(text: str, ignore_empty: bool = True) -> List[LyricLine]:
-    lines: List[LyricLine] = []
+    timestamps, texts = parse_lrc_soa(text, ignore_empty)
+    return [LyricLine(timestamp_ms=ts, text=content) for ts, content in zip(timestamps, texts)]
+
+
+def parse_lrc_soa(text: str, ignore_empty: bool = True) -> LyricColumns:
+    timestamps: List[int] = []
+    texts: List[str] = []
     if not text:
-        return lines
+        return timestamps, texts
 
     for raw_line in text.splitlines():
-        matches = list(TIMESTAMP_RE.finditer(raw_line))
-        if not matches:
-            continue
-        content = TIMESTAMP_RE.sub("", raw_line).strip()
+        # With one leading run of tags the text is a plain slice; sub() is only
+        # needed when tags are scattered through the line.
+        head = LEADING_TIMESTAMPS_RE.match(raw_line)
+        if head and not TIMESTAMP_RE.search(raw_line, head.end()):
+            stamps = TIMESTAMP_RE.findall(raw_line, 0, head.end())
+            content = raw_line[head.end() :].strip()
+        else:
+            stamps = TIMESTAMP_RE.findall(raw_line)
+            if not stamps:
+                word_timed = WORD_TIMED_LINE_RE.match(raw_line)
+                if word_timed is None:
+                    continue
+                # Keep the line start and drop the per-word timings around the text.
+                content = WORD_TIMING_RE.sub("", raw_line[word_timed.end() :]).strip()
+                if content or not ignore_empty:
+                    timestamps.append(int(word_timed.group(1)))
+                    texts.append(content)
+                continue
+            content = TIMESTAMP_RE.sub("", raw_line).strip()
         if ignore_empty and not content:
             continue
 
-        for match in matches:
-            minutes = int(match.group(1))
-            seconds = int(match.group(2))
-            ms_raw = match.group(3) or "0"
-            ms = int(ms_raw.ljust(3, "0")[:3])
-            timestamp_ms = (minutes * 60 + seconds) * 1000 + ms
-            lines.append(LyricLine(timestamp_ms=timestamp_ms, text=content))
+        for minutes, seconds, fraction in stamps:
+            try:
+                timestamp_ms = (
+                    (_CLOCK_DIGITS[minutes] * 60 + _CLOCK_DIGITS[seconds]) * 1000
+                    + _FRACTION_MS[fraction or "0"]
+                )
+            except KeyError:  # non-ASCII digits still match \d
+                ms = int((fraction or "0").ljust(3, "0")[:3])
+                timestamp_ms = (int(minutes) * 60 + int(seconds)) * 1000 + ms
+            timestamps.append(timestamp_ms)
+            texts.append(content)
 
-    return sorted(lines, key=lambda item: item.timestamp_ms)
+    # A stable argsort over the raw ints keeps same-timestamp lines in file order.
+    order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+    return [timestamps[i] for i in order], [texts[i] for i in order]
 
 
 def format_timestamp(timestamp_ms: int, fmt: str) -> str:
-    total_seconds = max(0, timestamp_ms // 1000)
-    hours = total_seconds // 3600
-    minutes = (total_seconds % 3600) // 60
-    seconds = total_seconds % 60
-    ms = timestamp_ms % 1000
-
-    values = {
-        "HH": f"{hours:02d}",
-        "mm": f"{minutes:02d}",
-        "ss": f"{seconds:02d}",
-        "SSS": f"{ms:03d}",
-        "SS": f"{ms // 10:02d}",
-        "S": f"{ms // 100:d}",
-    }
+    total_seconds, ms = divmod(timestamp_ms, 1000)
+    hours, rest = divmod(max(0, total_seconds), 3600)
+    minutes, seconds = divmod(rest, 60)
+    return _compile_timestamp_format(fmt).format(
+        hours, minutes, seconds, ms, ms // 10, ms // 100
+    )
 
-    for token in ("HH", "mm", "ss", "SSS", "SS", "S"):
-        fmt = fmt.replace(token, values[token])
-    return fmt
+
+@lru_cache(maxsize=16)
+def _compile_timestamp_format(fmt: str) -> str:
+    # Turn e.g. "[mm:ss.SS]" into "[{1:02d}:{2:02d}.{4:02d}]" once per format, so
+    # each call is a single str.format instead of six replace() passes.
+    parts: List[str] = []
+    end = 0
+    for match in TIMESTAMP_FORMAT_RE.finditer(fmt):
+        parts.append(fmt[end : match.start()].replace("{", "{{").replace("}", "}}"))
+        parts.append(_TIMESTAMP_FIELDS[match.group()])
+        end = match.end()
+    parts.append(fmt[end:].replace("{", "{{").replace("}", "}}"))
+    return "".join(parts)
 
 
-def _lines_to_map(lines: Iterable[LyricLine]) -> Dict[int, str]:
-    mapping: Dict[int, str] = {}
-    for line in lines:
-        mapping[line.timestamp_ms] = line.text
-    return mapping
+def _lines_to_map(columns: LyricColumns) -> Dict[int, str]:
+    return dict(zip(*columns))
 
 
 def _collect_timestamps(maps: Iterable[Dict[int, str]]) -> List[int]:
-    ts = set()
-    for mapping in maps:
-        ts.update(mapping.keys())
-    return sorted(ts)
+    # Every map is built from sorted parse_lrc output, so its keys are already
+    # ascending and a k-way merge yields the union in order.
+    return [ts for ts, _ in groupby(merge(*maps))]
 
 
-def _build_pinyin_lines(lines: List[LyricLine]) -> List[LyricLine]:
-    if not lazy_pinyin:
-        return []
+@lru_cache(maxsize=None)
+def _pinyin_converter() -> Optional[Callable[[str], List[str]]]:
+    # pypinyin loads large dictionaries; import it the first time pinyin is rendered.
+    try:
+        from pypinyin import lazy_pinyin  # type: ignore
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+    return lazy_pinyin
 
-    converted: List[LyricLine] = []
-    for line in lines:
-        if not line.text.strip():
-            converted.append(LyricLine(line.timestamp_ms, ""))
-            continue
-        converted.append(LyricLine(line.timestamp_ms, " ".join(lazy_pinyin(line.text))))
-    return converted
+
+def _build_pinyin_lines(columns: LyricColumns) -> LyricColumns:
+    lazy_pinyin = _pinyin_converter()
+    if not lazy_pinyin:
+        return [], []
+
+    timestamps, texts = columns
+    converted = [""] * len(texts)
+    indices = [index for index, text in enumerate(texts) if text.strip()]
+    for index, words in zip(indices, _pinyin_batch([texts[i] for i in indices], lazy_pinyin)):
+        converted[index] = " ".join(words)
+    return timestamps, converted
+
+
+def _pinyin_batch(
+    texts: List[str], lazy_pinyin: Callable[[str], List[str]]
+) -> List[List[str]]:
+    # One lazy_pinyin call for the whole song. pypinyin passes non-Han runs
+    # through as single tokens, so the sentinel can land inside a token and
+    # every token is split on it rather than compared against it.
+    if not texts or any(PINYIN_SENTINEL in text for text in texts):
+        return [lazy_pinyin(text) for text in texts]
+
+    groups: List[List[str]] = [[]]
+    for token in lazy_pinyin(PINYIN_SENTINEL.join(texts)):
+        pieces = token.split(PINYIN_SENTINEL)
+        for piece_index, piece in enumerate(pieces):
+            if piece_index:
+                groups.append([])
+            if piece:
+                groups[-1].append(piece)
+    if len(groups) != len(texts):
+        return [lazy_pinyin(text) for text in texts]
+    return groups
+
+
+def _truncate_columns(columns: LyricColumns, limit: int) -> LyricColumns:
+    timestamps, texts = columns
+    return timestamps[:limit], texts[:limit]
+
+
+@dataclass(frozen=True)
+class _RenderSettings:
+    """The AppConfig fields rendering depends on, in hashable form."""
+
+    prefer_verbatim: bool
+    ignore_empty_lines: bool
+    lrc_timestamp_format: str
+    srt_timestamp_format: str
+    output_encoding: str
 
 
 def build_output(
@@ -94,17 +201,60 @@ def build_output(
     output_format: OutputFormat,
     show_lrc_type: ShowLrcType,
     merge_separator: str,
+    max_lines: int | None = None,
 ) -> List[OutputPayload]:
+    # max_lines caps how many timestamps are rendered (previews); exports leave it unset.
     if not lyric_types:
         lyric_types = [LyricType.ORIGINAL]
 
-    raw_original = lyrics.verbatim if config.prefer_verbatim and lyrics.verbatim else lyrics.original
-
-    original_lines = parse_lrc(raw_original, config.ignore_empty_lines)
-    if not original_lines and raw_original != lyrics.original:
-        original_lines = parse_lrc(lyrics.original, config.ignore_empty_lines)
-    translated_lines = parse_lrc(lyrics.translated, config.ignore_empty_lines)
-    transliteration_lines = parse_lrc(lyrics.transliteration, config.ignore_empty_lines)
+    settings = _RenderSettings(
+        prefer_verbatim=config.prefer_verbatim,
+        ignore_empty_lines=config.ignore_empty_lines,
+        lrc_timestamp_format=config.lrc_timestamp_format,
+        srt_timestamp_format=config.srt_timestamp_format,
+        output_encoding=config.output_encoding,
+    )
+    rendered = _render_cached(
+        lyrics.original,
+        lyrics.verbatim,
+        lyrics.translated,
+        lyrics.transliteration,
+        settings,
+        tuple(lyric_types),
+        output_format,
+        show_lrc_type,
+        merge_separator,
+        max_lines,
+    )
+    # Payloads are mutable, so every call gets fresh copies of the cached fields.
+    return [OutputPayload(*fields) for fields in rendered]
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _render_cached(
+    original: str,
+    verbatim: str,
+    translated: str,
+    transliteration: str,
+    settings: _RenderSettings,
+    lyric_types: Tuple[LyricType, ...],
+    output_format: OutputFormat,
+    show_lrc_type: ShowLrcType,
+    merge_separator: str,
+    max_lines: int | None,
+) -> Tuple[Tuple[str, str, str, str | None], ...]:
+    raw_original = verbatim if settings.prefer_verbatim and verbatim else original
+
+    original_lines = parse_lrc_soa(raw_original, settings.ignore_empty_lines)
+    if not original_lines[0] and raw_original != original:
+        original_lines = parse_lrc_soa(original, settings.ignore_empty_lines)
+    translated_lines = parse_lrc_soa(translated, settings.ignore_empty_lines)
+    transliteration_lines = parse_lrc_soa(transliteration, settings.ignore_empty_lines)
+    if max_lines is not None:
+        # Parsed lines are sorted, so the first timestamps all live in these prefixes.
+        original_lines = _truncate_columns(original_lines, max_lines)
+        translated_lines = _truncate_columns(translated_lines, max_lines)
+        transliteration_lines = _truncate_columns(transliteration_lines, max_lines)
     pinyin_lines = _build_pinyin_lines(original_lines)
 
     line_maps: Dict[LyricType, Dict[int, str]] = {
@@ -120,34 +270,39 @@ def build_output(
             payload = _render_output(
                 line_maps[lyric_type],
                 output_format,
-                config,
+                settings,
                 merge_separator,
                 show_lrc_type,
                 [lyric_type],
+                max_lines,
             )
             payload.suffix = lyric_type.value
             outputs.append(payload)
-        return outputs
-
-    payload = _render_output(
-        line_maps,
-        output_format,
-        config,
-        merge_separator,
-        show_lrc_type,
-        lyric_types,
+    else:
+        payload = _render_output(
+            line_maps,
+            output_format,
+            settings,
+            merge_separator,
+            show_lrc_type,
+            list(lyric_types),
+            max_lines,
+        )
+        outputs.append(payload)
+    return tuple(
+        (payload.content, payload.extension, payload.encoding, payload.suffix)
+        for payload in outputs
     )
-    outputs.append(payload)
-    return outputs
 
 
 def _render_output(
     maps: Dict[int, str] | Dict[LyricType, Dict[int, str]],
     output_format: OutputFormat,
-    config: AppConfig,
+    settings: _RenderSettings,
     merge_separator: str,
     show_lrc_type: ShowLrcType,
     lyric_types: List[LyricType],
+    max_lines: int | None = None,
 ) -> OutputPayload:
     if isinstance(maps, dict) and lyric_types and (not maps or isinstance(next(iter(maps.values())), str)):
         type_maps = {lyric_types[0]: maps}  # isolated mode
@@ -155,36 +310,40 @@ def _render_output(
         type_maps = maps  # type: ignore[assignment]
 
     timestamps = _collect_timestamps(type_maps.values())
+    if max_lines is not None:
+        timestamps = timestamps[:max_lines]
 
     if output_format == OutputFormat.SRT:
-        text = _render_srt(type_maps, timestamps, config, merge_separator, show_lrc_type, lyric_types)
-        return OutputPayload(content=text, extension="srt", encoding=config.output_encoding)
+        text = _render_srt(type_maps, timestamps, settings, merge_separator, show_lrc_type, lyric_types)
+        return OutputPayload(content=text, extension="srt", encoding=settings.output_encoding)
 
-    text = _render_lrc(type_maps, timestamps, config, merge_separator, show_lrc_type, lyric_types)
-    return OutputPayload(content=text, extension="lrc", encoding=config.output_encoding)
+    text = _render_lrc(type_maps, timestamps, settings, merge_separator, show_lrc_type, lyric_types)
+    return OutputPayload(content=text, extension="lrc", encoding=settings.output_encoding)
 
 
 def _render_lrc(
     type_maps: Dict[LyricType, Dict[int, str]],
     timestamps: List[int],
-    config: AppConfig,
+    settings: _RenderSettings,
     merge_separator: str,
     show_lrc_type: ShowLrcType,
     lyric_types: List[LyricType],
 ) -> str:
     lines: List[str] = []
+    maps = [type_maps.get(lyric_type, {}) for lyric_type in lyric_types]
+    ignore_empty = settings.ignore_empty_lines
+    merge = show_lrc_type == ShowLrcType.MERGE
+    lrc_format = settings.lrc_timestamp_format
     for ts in timestamps:
-        if show_lrc_type == ShowLrcType.MERGE:
-            merged = _merge_texts(type_maps, lyric_types, ts, merge_separator, config.ignore_empty_lines)
+        texts = _texts_at(maps, ts, ignore_empty)
+        if merge:
+            merged = merge_separator.join(texts).strip()
             if not merged:
                 continue
-            lines.append(f"{format_timestamp(ts, config.lrc_timestamp_format)}{merged}")
-        else:
-            for lyric_type in lyric_types:
-                text = type_maps.get(lyric_type, {}).get(ts, "")
-                if config.ignore_empty_lines and not text:
-                    continue
-                lines.append(f"{format_timestamp(ts, config.lrc_timestamp_format)}{text}")
+            lines.append(f"{format_timestamp(ts, lrc_format)}{merged}")
+        elif texts:
+            stamp = format_timestamp(ts, lrc_format)
+            lines.extend(f"{stamp}{text}" for text in texts)
 
     return "\n".join(lines)
 
@@ -192,59 +351,41 @@ def _render_lrc(
 def _render_srt(
     type_maps: Dict[LyricType, Dict[int, str]],
     timestamps: List[int],
-    config: AppConfig,
+    settings: _RenderSettings,
     merge_separator: str,
     show_lrc_type: ShowLrcType,
     lyric_types: List[LyricType],
 ) -> str:
     segments: List[str] = []
     segment_index = 1
+    maps = [type_maps.get(lyric_type, {}) for lyric_type in lyric_types]
+    ignore_empty = settings.ignore_empty_lines
+    merge = show_lrc_type == ShowLrcType.MERGE
+    srt_format = settings.srt_timestamp_format
+    # Each cue ends where the next begins, so every stamp is formatted once and
+    # shared; the last cue gets a fixed two seconds.
+    stamps = [format_timestamp(ts, srt_format) for ts in timestamps]
+    if timestamps:
+        stamps.append(format_timestamp(timestamps[-1] + 2000, srt_format))
     for idx, ts in enumerate(timestamps):
-        end_ts = timestamps[idx + 1] if idx + 1 < len(timestamps) else ts + 2000
-
-        if show_lrc_type == ShowLrcType.MERGE:
-            text = _merge_texts(type_maps, lyric_types, ts, merge_separator, config.ignore_empty_lines)
-            if not text:
-                continue
-            content = text
-        else:
-            texts: List[str] = []
-            for lyric_type in lyric_types:
-                text = type_maps.get(lyric_type, {}).get(ts, "")
-                if config.ignore_empty_lines and not text:
-                    continue
-                texts.append(text)
-            if not texts:
+        texts = _texts_at(maps, ts, ignore_empty)
+        if merge:
+            content = merge_separator.join(texts).strip()
+            if not content:
                 continue
+        elif texts:
             content = "\n".join(texts)
+        else:
+            continue
 
-        segments.append(
-            "\n".join(
-                [
-                    str(segment_index),
-                    f"{format_timestamp(ts, config.srt_timestamp_format)} --> "
-                    f"{format_timestamp(end_ts, config.srt_timestamp_format)}",
-                    content,
-                    "",
-                ]
-            )
-        )
+        segments.append(f"{segment_index}\n{stamps[idx]} --> {stamps[idx + 1]}\n{content}\n")
         segment_index += 1
 
     return "\n".join(segments).strip()
 
 
-def _merge_texts(
-    type_maps: Dict[LyricType, Dict[int, str]],
-    lyric_types: List[LyricType],
-    ts: int,
-    separator: str,
-    ignore_empty: bool,
-) -> str:
-    parts: List[str] = []
-    for lyric_type in lyric_types:
-        text = type_maps.get(lyric_type, {}).get(ts, "")
-        if ignore_empty and not text:
-            continue
-        parts.append(text)
-    return separator.join(parts).strip()
+def _texts_at(maps: List[Dict[int, str]], ts: int, ignore_empty: bool) -> List[str]:
+    texts = [mapping.get(ts, "") for mapping in maps]
+    if ignore_empty:
+        return [text for text in texts if text]
+    return texts
@@ -2,11 +2,17 @@ from __future__ import annotations
 
 import hashlib
 import random
-from typing import List, Optional
+from functools import lru_cache
+from typing import Iterator, List, Optional
 
 import requests
 
 from ..config import AppConfig
+from ..net import create_session
+
+
+# Baidu rejects queries longer than this many UTF-8 bytes.
+BAIDU_MAX_QUERY_BYTES = 6000
 
 
 class TranslatorError(RuntimeError):
@@ -22,45 +28,65 @@ class BaiduTranslator(BaseTranslator):
     def __init__(self, app_id: str, secret: str) -> None:
         self._app_id = app_id
         self._secret = secret
+        self._session = create_session()
+        # The signature is md5(app_id + query + salt + secret); hash the fixed
+        # prefix once and copy the state for each request.
+        self._sign_base = hashlib.md5(app_id.encode("utf-8"))
 
     def translate(self, lines: List[str], target_lang: str) -> List[str]:
-        results: List[str] = []
-        for line in lines:
-            if not line.strip():
-                results.append("")
-                continue
-
-            salt = str(random.randint(10000, 99999))
-            sign_raw = f"{self._app_id}{line}{salt}{self._secret}"
-            sign = hashlib.md5(sign_raw.encode("utf-8")).hexdigest()
-            params = {
-                "q": line,
-                "from": "auto",
-                "to": target_lang,
-                "appid": self._app_id,
-                "salt": salt,
-                "sign": sign,
-            }
-            try:
-                resp = requests.get(
-                    "https://fanyi-api.baidu.com/api/trans/vip/translate",
-                    params=params,
-                    timeout=15,
-                )
-                data = resp.json()
-            except requests.RequestException as exc:
-                raise TranslatorError("Baidu translate request failed") from exc
-
-            if "trans_result" not in data:
-                raise TranslatorError(data.get("error_msg", "Baidu translate failed"))
-            results.append(data["trans_result"][0].get("dst", ""))
-
+        # Baidu translates newline-separated text line by line, so a whole song
+        # goes out in as few signed requests as the query size limit allows.
+        results = [""] * len(lines)
+        indices = [index for index, line in enumerate(lines) if line.strip()]
+        for chunk in _byte_chunks(indices, lines, BAIDU_MAX_QUERY_BYTES):
+            translated = self._translate_query("\n".join(lines[i] for i in chunk), target_lang)
+            if len(translated) != len(chunk):
+                # Lines could not be paired back up; ask for each one on its own.
+                translated = [
+                    " ".join(self._translate_query(lines[i], target_lang)) for i in chunk
+                ]
+            for index, text in zip(chunk, translated):
+                results[index] = text
         return results
 
+    def _translate_query(self, query: str, target_lang: str) -> List[str]:
+        salt = str(random.randint(10000, 99999))
+        digest = self._sign_base.copy()
+        digest.update(f"{query}{salt}{self._secret}".encode("utf-8"))
+        sign = digest.hexdigest()
+        params = {
+            "q": query,
+            "from": "auto",
+            "to": target_lang,
+            "appid": self._app_id,
+            "salt": salt,
+            "sign": sign,
+        }
+        try:
+            resp = self._session.post(
+                "https://fanyi-api.baidu.com/api/trans/vip/translate",
+                data=params,
+                timeout=15,
+            )
+            data = resp.json()
+        except requests.RequestException as exc:
+            raise TranslatorError("Baidu translate request failed") from exc
+
+        if "trans_result" not in data:
+            raise TranslatorError(data.get("error_msg", "Baidu translate failed"))
+        return [item.get("dst", "") for item in data["trans_result"]]
+
 
 class CaiyunTranslator(BaseTranslator):
     def __init__(self, token: str) -> None:
         self._token = token
+        self._session = create_session()
+        self._session.headers.update(
+            {
+                "X-Authorization": f"token {token}",
+                "Content-Type": "application/json",
+            }
+        )
 
     def translate(self, lines: List[str], target_lang: str) -> List[str]:
         if not lines:
@@ -72,15 +98,10 @@ class CaiyunTranslator(BaseTranslator):
             "request_id": "lyricbridge",
             "detect": True,
         }
-        headers = {
-            "X-Authorization": f"token {self._token}",
-            "Content-Type": "application/json",
-        }
         try:
-            resp = requests.post(
+            resp = self._session.post(
                 "https://api.interpreter.caiyunai.com/v1/translator",
                 json=payload,
-                headers=headers,
                 timeout=15,
             )
             data = resp.json()
@@ -92,9 +113,34 @@ class CaiyunTranslator(BaseTranslator):
         return [str(item) for item in data["target"]]
 
 
+def _byte_chunks(indices: List[int], lines: List[str], limit: int) -> Iterator[List[int]]:
+    chunk: List[int] = []
+    size = 0
+    for index in indices:
+        line_size = len(lines[index].encode("utf-8")) + 1
+        if chunk and size + line_size > limit:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(index)
+        size += line_size
+    if chunk:
+        yield chunk
+
+
 def get_translator(config: AppConfig) -> Optional[BaseTranslator]:
-    if config.translation_provider == "baidu" and config.baidu_app_id and config.baidu_secret:
-        return BaiduTranslator(config.baidu_app_id, config.baidu_secret)
-    if config.translation_provider == "caiyun" and config.caiyun_token:
-        return CaiyunTranslator(config.caiyun_token)
+    return _translator_for(
+        config.translation_provider, config.baidu_app_id, config.baidu_secret, config.caiyun_token
+    )
+
+
+# Translators are stateless apart from their pooled sessions, so exports with
+# the same credentials share one instance and its warm connections.
+@lru_cache(maxsize=4)
+def _translator_for(
+    provider: str, baidu_app_id: str, baidu_secret: str, caiyun_token: str
+) -> Optional[BaseTranslator]:
+    if provider == "baidu" and baidu_app_id and baidu_secret:
+        return BaiduTranslator(baidu_app_id, baidu_secret)
+    if provider == "caiyun" and caiyun_token:
+        return CaiyunTranslator(caiyun_token)
     return None
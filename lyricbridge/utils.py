@@ -1,13 +1,17 @@
 from __future__ import annotations
 
 import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, Iterable, Iterator, List, Optional
-
-import requests
+from functools import lru_cache
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Pattern, Tuple
 
 from .models import InputSongId, SearchSource, SearchType
 
+if TYPE_CHECKING:
+    import requests
+
 
 SEARCH_SOURCE_KEYWORDS: Dict[SearchSource, str] = {
     SearchSource.NETEASE: "163.com",
@@ -27,18 +31,80 @@ SEARCH_TYPE_KEYWORDS: Dict[SearchSource, Dict[SearchType, str]] = {
     },
 }
 
-QQ_SHARE_PATTERNS = [
-    (re.compile(r"playsong\.html\?songid=([^&]*)(?:&.*)?$"), SearchType.SONG),
-    (re.compile(r"playsong\.html\?songmid=([^&]*)(?:&.*)?$"), SearchType.SONG),
-    (re.compile(r"album\.html\?albummid=([^&]*)(?:&.*)?$"), SearchType.ALBUM),
-    (re.compile(r"album\.html\?(?:.*&)?albumId=([^&]*)(?:&.*)?$"), SearchType.ALBUM),
-    (re.compile(r"taoge\.html\?id=([^&]*)(?:&.*)?$"), SearchType.PLAYLIST),
-]
-
-TOKEN_SPLIT_RE = re.compile(r"[\s,;]+")
-ALNUM_RE = re.compile(r"^[A-Za-z0-9]+$")
-NUM_RE = re.compile(r"^\d+$")
+
+def _keyword_pattern(keywords: Iterable[str]) -> Pattern[str]:
+    # One lookahead per keyword, tried in table order: the first table entry found
+    # anywhere in the token wins, exactly like sequential `in` checks, and
+    # match.lastindex says which one it was.
+    return re.compile("|".join(f"(?=.*?({re.escape(keyword)}))" for keyword in keywords), re.S)
+
+
+def _keyword_id_pattern(keyword: str) -> Pattern[str]:
+    # "*" rather than "+": only the first occurrence of the keyword counts, even
+    # when no ID follows it.
+    return re.compile(re.escape(keyword) + r"([A-Za-z0-9]*)")
+
+
+SOURCE_KEYWORD_RE = _keyword_pattern(SEARCH_SOURCE_KEYWORDS.values())
+SOURCES_BY_GROUP: Tuple[SearchSource, ...] = tuple(SEARCH_SOURCE_KEYWORDS)
+TYPE_KEYWORD_RES: Dict[SearchSource, Tuple[Pattern[str], Tuple[SearchType, ...]]] = {
+    source: (_keyword_pattern(keywords.values()), tuple(keywords))
+    for source, keywords in SEARCH_TYPE_KEYWORDS.items()
+}
+KEYWORD_ID_RES: Dict[str, Pattern[str]] = {
+    keyword: _keyword_id_pattern(keyword)
+    for keywords in SEARCH_TYPE_KEYWORDS.values()
+    for keyword in keywords.values()
+}
+
+# All QQ share-link shapes in one pass. Each branch is a lookahead tried in
+# order, so the first shape found anywhere wins, as with separate searches;
+# match.lastgroup names it.
+QQ_SHARE_RE = re.compile(
+    r"(?=(?s:.*?)playsong\.html\?songid=(?P<song_id>[^&]*)(?:&.*)?$)"
+    r"|(?=(?s:.*?)playsong\.html\?songmid=(?P<song_mid>[^&]*)(?:&.*)?$)"
+    r"|(?=(?s:.*?)album\.html\?albummid=(?P<album_mid>[^&]*)(?:&.*)?$)"
+    r"|(?=(?s:.*?)album\.html\?(?:.*&)?albumId=(?P<album_id>[^&]*)(?:&.*)?$)"
+    r"|(?=(?s:.*?)taoge\.html\?id=(?P<playlist_id>[^&]*)(?:&.*)?$)"
+)
+QQ_SHARE_TYPES: Dict[str, SearchType] = {
+    "song_id": SearchType.SONG,
+    "song_mid": SearchType.SONG,
+    "album_mid": SearchType.ALBUM,
+    "album_id": SearchType.ALBUM,
+    "playlist_id": SearchType.PLAYLIST,
+}
+# Share-link group name -> the canonical QQ keyword it is rewritten to.
+QQ_SHARE_KEYWORDS: Dict[str, str] = {
+    name: SEARCH_TYPE_KEYWORDS[SearchSource.QQ][search_type]
+    for name, search_type in QQ_SHARE_TYPES.items()
+}
+
+# Whether a token is already a bare id for the source. NetEase ids are decimal
+# (exactly what \d accepts); QQ ids and mids are ASCII letters and digits.
+BARE_ID_VALIDATORS: Dict[SearchSource, Callable[[str], bool]] = {
+    SearchSource.NETEASE: str.isdecimal,
+    SearchSource.QQ: lambda token: token.isascii() and token.isalnum(),
+}
+
+# Commas and semicolons separate tokens like whitespace does.
+TOKEN_SEPARATOR_TABLE = str.maketrans(",;", "  ")
 FILL_LENGTH_RE = re.compile(r"\$fillLength\(([^)]*)\)")
+TEMPLATE_FIELD_RE = re.compile(r"\$\{(\w+)\}")
+UNSAFE_FILENAME_TABLE = str.maketrans(dict.fromkeys("\\/:*?\"<>|", "_"))
+
+# Short links that redirect to further short links are followed this many times.
+MAX_SHORT_LINK_HOPS = 5
+SHORT_LINK_WORKERS = 8
+
+
+@lru_cache(maxsize=None)
+def _session() -> requests.Session:
+    # Shared so a batch of share links to the same host reuses one keep-alive
+    # connection; built on first use so importing utils does not load requests.
+    from .net import create_session
+
+    return create_session()
 
 
 class InputParseError(ValueError):
@@ -46,28 +112,37 @@ class InputParseError(ValueError):
 
 
 def tokenize_input(raw: str) -> List[str]:
-    return [token for token in TOKEN_SPLIT_RE.split(raw.strip()) if token]
+    return raw.translate(TOKEN_SEPARATOR_TABLE).split()
 
 
 def convert_share_link(source: SearchSource, input_text: str) -> str:
-    if source != SearchSource.QQ:
+    if source is not SearchSource.QQ:
+        return input_text
+    # Every share pattern has an "html?" query; plain IDs and other URLs skip them all.
+    if "html?" not in input_text:
         return input_text
 
-    for pattern, search_type in QQ_SHARE_PATTERNS:
-        match = pattern.search(input_text)
-        if match:
-            keyword = SEARCH_TYPE_KEYWORDS[source][search_type]
-            return keyword + match.group(1)
+    match = QQ_SHARE_RE.match(input_text)
+    if not match:
+        return input_text
 
-    return input_text
+    return QQ_SHARE_KEYWORDS[match.lastgroup] + match.group(match.lastgroup)
 
 
 def resolve_short_link(input_text: str) -> Optional[str]:
     if "fcgi-bin/u" not in input_text:
         return None
 
+    import requests
+
+    # Only the final URL matters, so follow the redirects with HEAD. Servers that
+    # refuse HEAD get a streamed GET whose body is never read.
+    session = _session()
     try:
-        resp = requests.get(input_text, allow_redirects=True, timeout=10)
+        resp = session.head(input_text, allow_redirects=True, timeout=10)
+        if resp.status_code >= 400 or resp.url == input_text:
+            resp = session.get(input_text, allow_redirects=True, timeout=10, stream=True)
+            resp.close()
     except requests.RequestException:
         return None
 
@@ -78,16 +153,12 @@ def resolve_short_link(input_text: str) -> Optional[str]:
 
 
 def extract_id_from_keyword(input_text: str, keyword: str) -> Optional[str]:
-    index = input_text.find(keyword)
-    if index == -1:
-        return None
-
-    suffix = input_text[index + len(keyword) :]
-    match = re.match(r"([A-Za-z0-9]+)", suffix)
+    pattern = KEYWORD_ID_RES.get(keyword) or _keyword_id_pattern(keyword)
+    match = pattern.search(input_text)
     if not match:
         return None
 
-    return match.group(1)
+    return match.group(1) or None
 
 
 def parse_input_ids(
@@ -97,96 +168,131 @@ def parse_input_ids(
     if not tokens:
         raise InputParseError("Input is empty")
 
-    results: List[InputSongId] = []
-    for token in tokens:
-        search_source = default_source
-        for source, keyword in SEARCH_SOURCE_KEYWORDS.items():
-            if keyword in token:
-                search_source = source
-                break
-
+    # Slots stay pending until they classify to an id. Short links resolve to a
+    # single URL that takes the token's place; each round resolves every pending
+    # link at once, and chains are followed up to a fixed number of hops.
+    pending = {index: (token, default_source, default_type) for index, token in enumerate(tokens)}
+    results: Dict[int, InputSongId] = {}
+    for hop in range(MAX_SHORT_LINK_HOPS + 1):
+        short_links: Dict[int, Tuple[str, SearchSource, SearchType]] = {}
+        for index, (token, search_source, search_type) in pending.items():
+            song_id, search_source, search_type, token = _classify_token(
+                token, search_source, search_type
+            )
+            if song_id:
+                results[index] = InputSongId(song_id, search_source, search_type)
+            elif search_source is SearchSource.QQ and "fcgi-bin/u" in token:
+                short_links[index] = (token, search_source, search_type)
+            else:
+                raise InputParseError(f"Illegal input: {token}")
+        if not short_links:
+            break
+        if hop == MAX_SHORT_LINK_HOPS:
+            # Out of hops: fail before sending another round of requests.
+            token = next(iter(short_links.values()))[0]
+            raise InputParseError(f"Too many redirects: {token}")
+
+        redirects = _resolve_short_links([token for token, _, _ in short_links.values()])
+        pending = {}
+        for (index, (token, search_source, search_type)), redirect_url in zip(
+            short_links.items(), redirects
+        ):
+            if not redirect_url:
+                raise InputParseError(f"Illegal input: {token}")
+            pending[index] = (redirect_url, search_source, search_type)
+
+    return [results[index] for index in range(len(tokens))]
+
+
+def _resolve_short_links(urls: List[str]) -> List[Optional[str]]:
+    # Each resolve is a network round trip, so several links overlap on threads.
+    if len(urls) == 1:
+        return [resolve_short_link(urls[0])]
+    with ThreadPoolExecutor(max_workers=min(SHORT_LINK_WORKERS, len(urls))) as pool:
+        return list(pool.map(resolve_short_link, urls))
+
+
+@lru_cache(maxsize=4096)
+def _classify_token(
+    token: str, default_source: SearchSource, default_type: SearchType
+) -> Tuple[Optional[str], SearchSource, SearchType, str]:
+    # The offline part of parse_input_ids, cached because the same IDs and links
+    # are often pasted again. Returns (song id or None, source, type, converted token).
+    match = SOURCE_KEYWORD_RE.match(token)
+    search_source = SOURCES_BY_GROUP[match.lastindex - 1] if match else default_source
+
+    if search_source is SearchSource.QQ:
         token = convert_share_link(search_source, token)
 
-        search_type = default_type
-        type_keywords = SEARCH_TYPE_KEYWORDS[search_source]
-        for search_type_candidate, keyword in type_keywords.items():
-            if keyword in token:
-                search_type = search_type_candidate
-                break
-
-        if search_source == SearchSource.NETEASE and NUM_RE.match(token):
-            results.append(InputSongId(token, search_source, search_type))
-            continue
+    type_re, types_by_group = TYPE_KEYWORD_RES[search_source]
+    match = type_re.match(token)
+    search_type = types_by_group[match.lastindex - 1] if match else default_type
 
-        if search_source == SearchSource.QQ and ALNUM_RE.match(token):
-            results.append(InputSongId(token, search_source, search_type))
-            continue
+    if BARE_ID_VALIDATORS[search_source](token):
+        return token, search_source, search_type, token
 
-        extracted = extract_id_from_keyword(token, type_keywords[search_type])
-        if extracted:
-            results.append(InputSongId(extracted, search_source, search_type))
-            continue
-
-        if search_source == SearchSource.QQ and "fcgi-bin/u" in token:
-            redirect_url = resolve_short_link(token)
-            if redirect_url:
-                nested = parse_input_ids(redirect_url, search_source, search_type)
-                results.extend(nested)
-                continue
-
-        raise InputParseError(f"Illegal input: {token}")
-
-    return results
+    keyword = SEARCH_TYPE_KEYWORDS[search_source][search_type]
+    return extract_id_from_keyword(token, keyword), search_source, search_type, token
 
 
 def batch(iterable: Iterable[str], size: int) -> Iterator[List[str]]:
     if size <= 0:
         raise ValueError("Batch size must be > 0")
 
-    bucket: List[str] = []
-    for item in iterable:
-        bucket.append(item)
-        if len(bucket) >= size:
-            yield bucket
-            bucket = []
-    if bucket:
+    iterator = iter(iterable)
+    while True:
+        bucket = list(islice(iterator, size))
+        if not bucket:
+            return
         yield bucket
 
 
 def safe_filename(name: str) -> str:
-    name = re.sub(r"[\\/:*?\"<>|]", "_", name)
-    name = name.strip()
-    return name or "lyrics"
+    return name.translate(UNSAFE_FILENAME_TABLE).strip() or "lyrics"
 
 
 def render_filename(template: str, tokens: Dict[str, str]) -> str:
-    result = template
-    for key, value in tokens.items():
-        result = result.replace(f"${{{key}}}", value)
+    return compile_filename_template(template)(tokens)
+
+
+def compile_filename_template(template: str) -> Callable[[Dict[str, str]], str]:
+    # Split once into alternating literal/field chunks so each song only joins strings.
+    chunks = TEMPLATE_FIELD_RE.split(template)
+    literals = chunks[0::2]
+    fields = chunks[1::2]
 
-    for match in FILL_LENGTH_RE.finditer(result):
-        raw = match.group(0)
-        params = match.group(1).split(",")
-        if len(params) != 3:
-            continue
-        content, symbol, length_str = [p.strip() for p in params]
-        try:
-            target_length = int(length_str)
-        except ValueError:
-            continue
+    def render(tokens: Dict[str, str]) -> str:
+        parts = [literals[0]]
+        for field, literal in zip(fields, literals[1:]):
+            parts.append(tokens.get(field, f"${{{field}}}"))
+            parts.append(literal)
+        return safe_filename(_apply_fill_length("".join(parts)))
 
-        filled = content
-        while len(filled) < target_length:
-            diff = target_length - len(filled)
-            filled = (symbol[:diff] if diff < len(symbol) else symbol) + filled
+    return render
 
-        result = result.replace(raw, filled)
 
-    return safe_filename(result)
+def _apply_fill_length(result: str) -> str:
+    return FILL_LENGTH_RE.sub(_fill_length, result)
+
+
+def _fill_length(match: re.Match) -> str:
+    params = match.group(1).split(",")
+    if len(params) != 3:
+        return match.group()
+    content, symbol, length_str = [p.strip() for p in params]
+    try:
+        target_length = int(length_str)
+    except ValueError:
+        return match.group()
+    if not symbol:
+        return content  # nothing to pad with
+
+    # Whole symbols fill from the content outwards and any remainder is a
+    # leading partial symbol, e.g. ("7", "ab", 4) -> "aab7".
+    full, partial = divmod(max(0, target_length - len(content)), len(symbol))
+    return symbol[:partial] + symbol * full + content
 
 
 def format_duration(duration_ms: int) -> str:
-    total_seconds = max(0, duration_ms // 1000)
-    minutes = total_seconds // 60
-    seconds = total_seconds % 60
+    minutes, seconds = divmod(max(0, duration_ms // 1000), 60)
     return f"{minutes:02d}:{seconds:02d}"
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import ctypes
+from ctypes import wintypes
+from pathlib import Path
+from typing import Optional
+
+
+MAX_PATH = 260
+SAVE_BUFFER_SIZE = 32768
+
+OFN_OVERWRITEPROMPT = 0x00000002
+OFN_NOCHANGEDIR = 0x00000008
+OFN_PATHMUSTEXIST = 0x00000800
+OFN_EXPLORER = 0x00080000
+
+BIF_RETURNONLYFSDIRS = 0x00000001
+BIF_NEWDIALOGSTYLE = 0x00000040
+BFFM_INITIALIZED = 1
+BFFM_SETSELECTIONW = 0x0467
+
+COINIT_APARTMENTTHREADED = 0x2
+S_OK = 0
+S_FALSE = 1
+
+
+class OPENFILENAMEW(ctypes.Structure):
+    _fields_ = [
+        ("lStructSize", wintypes.DWORD),
+        ("hwndOwner", wintypes.HWND),
+        ("hInstance", wintypes.HINSTANCE),
+        ("lpstrFilter", wintypes.LPCWSTR),
+        ("lpstrCustomFilter", wintypes.LPWSTR),
+        ("nMaxCustFilter", wintypes.DWORD),
+        ("nFilterIndex", wintypes.DWORD),
+        ("lpstrFile", wintypes.LPWSTR),
+        ("nMaxFile", wintypes.DWORD),
+        ("lpstrFileTitle", wintypes.LPWSTR),
+        ("nMaxFileTitle", wintypes.DWORD),
+        ("lpstrInitialDir", wintypes.LPCWSTR),
+        ("lpstrTitle", wintypes.LPCWSTR),
+        ("Flags", wintypes.DWORD),
+        ("nFileOffset", wintypes.WORD),
+        ("nFileExtension", wintypes.WORD),
+        ("lpstrDefExt", wintypes.LPCWSTR),
+        ("lCustData", wintypes.LPARAM),
+        ("lpfnHook", ctypes.c_void_p),
+        ("lpTemplateName", wintypes.LPCWSTR),
+        ("pvReserved", ctypes.c_void_p),
+        ("dwReserved", wintypes.DWORD),
+        ("FlagsEx", wintypes.DWORD),
+    ]
+
+
+class BROWSEINFOW(ctypes.Structure):
+    _fields_ = [
+        ("hwndOwner", wintypes.HWND),
+        ("pidlRoot", ctypes.c_void_p),
+        ("pszDisplayName", wintypes.LPWSTR),
+        ("lpszTitle", wintypes.LPCWSTR),
+        ("ulFlags", wintypes.UINT),
+        ("lpfn", ctypes.c_void_p),
+        ("lParam", wintypes.LPARAM),
+        ("iImage", ctypes.c_int),
+    ]
+
+
+def save_file_dialog(title: str, initial_dir: Optional[Path], default_name: str) -> Optional[Path]:
+    comdlg32 = ctypes.windll.comdlg32
+    comdlg32.GetSaveFileNameW.argtypes = [ctypes.POINTER(OPENFILENAMEW)]
+    comdlg32.GetSaveFileNameW.restype = wintypes.BOOL
+    comdlg32.CommDlgExtendedError.restype = wintypes.DWORD
+
+    buffer = ctypes.create_unicode_buffer(default_name, SAVE_BUFFER_SIZE)
+    ofn = OPENFILENAMEW()
+    ofn.lStructSize = ctypes.sizeof(OPENFILENAMEW)
+    ofn.lpstrFile = ctypes.cast(buffer, wintypes.LPWSTR)
+    ofn.nMaxFile = SAVE_BUFFER_SIZE
+    ofn.lpstrInitialDir = str(initial_dir) if initial_dir else None
+    ofn.lpstrTitle = title
+    ofn.Flags = OFN_OVERWRITEPROMPT | OFN_NOCHANGEDIR | OFN_PATHMUSTEXIST | OFN_EXPLORER
+
+    if comdlg32.GetSaveFileNameW(ctypes.byref(ofn)):
+        return Path(buffer.value) if buffer.value else None
+
+    error = comdlg32.CommDlgExtendedError()
+    if error:
+        raise OSError(f"GetSaveFileNameW failed with code {error:#x}")
+    return None
+
+
+def folder_dialog(title: str, initial_dir: Optional[Path]) -> Optional[Path]:
+    ole32 = ctypes.windll.ole32
+    shell32 = ctypes.windll.shell32
+    user32 = ctypes.windll.user32
+    shell32.SHBrowseForFolderW.argtypes = [ctypes.POINTER(BROWSEINFOW)]
+    shell32.SHBrowseForFolderW.restype = ctypes.c_void_p
+    shell32.SHGetPathFromIDListW.argtypes = [ctypes.c_void_p, wintypes.LPWSTR]
+    shell32.SHGetPathFromIDListW.restype = wintypes.BOOL
+    ole32.CoTaskMemFree.argtypes = [ctypes.c_void_p]
+    ole32.CoInitializeEx.argtypes = [ctypes.c_void_p, wintypes.DWORD]
+    ole32.CoInitializeEx.restype = ctypes.c_long  # HRESULT
+    user32.SendMessageW.argtypes = [wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+
+    initial = ctypes.create_unicode_buffer(str(initial_dir)) if initial_dir else None
+
+    def on_event(hwnd, message, _lparam, data):
+        if message == BFFM_INITIALIZED and data:
+            user32.SendMessageW(hwnd, BFFM_SETSELECTIONW, 1, data)
+        return 0
+
+    callback_type = ctypes.WINFUNCTYPE(
+        ctypes.c_int, wintypes.HWND, wintypes.UINT, wintypes.LPARAM, wintypes.LPARAM
+    )
+    callback = callback_type(on_event)
+    display_name = ctypes.create_unicode_buffer(MAX_PATH)
+    info = BROWSEINFOW()
+    info.pszDisplayName = ctypes.cast(display_name, wintypes.LPWSTR)
+    info.lpszTitle = title
+    info.ulFlags = BIF_RETURNONLYFSDIRS | BIF_NEWDIALOGSTYLE
+    info.lpfn = ctypes.cast(callback, ctypes.c_void_p)
+    info.lParam = ctypes.addressof(initial) if initial is not None else 0
+
+    # The new-style folder dialog needs COM initialised on the calling thread.
+    # Only balance our own successful call: RPC_E_CHANGED_MODE means the thread
+    # already runs a different apartment that is not ours to tear down.
+    hr = ole32.CoInitializeEx(None, COINIT_APARTMENTTHREADED)
+    try:
+        pidl = shell32.SHBrowseForFolderW(ctypes.byref(info))
+        if not pidl:
+            return None
+        try:
+            path = ctypes.create_unicode_buffer(SAVE_BUFFER_SIZE)
+            if not shell32.SHGetPathFromIDListW(pidl, path):
+                raise OSError("SHGetPathFromIDListW failed")
+        finally:
+            ole32.CoTaskMemFree(pidl)
+    finally:
+        if hr in (S_OK, S_FALSE):
+            ole32.CoUninitialize()
+
+    return Path(path.value) if path.value else None
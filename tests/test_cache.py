@@ -0,0 +1,59 @@
+from lyricbridge.models import Lyrics, SearchSource
+from lyricbridge.services import cache as cache_module
+from lyricbridge.services.cache import LyricsCache
+
+
+def _lyrics(text="[00:01.00]hello"):
+    return Lyrics(source=SearchSource.NETEASE, original=text)
+
+
+def _set_clock(monkeypatch, now):
+    monkeypatch.setattr(cache_module.time, "time", lambda: now)
+
+
+def test_entries_survive_a_restart(tmp_path):
+    path = tmp_path / "lyrics.sqlite3"
+    LyricsCache(path).set(("netease", "1", False), _lyrics())
+
+    assert LyricsCache(path).get(("netease", "1", False)) == _lyrics()
+    assert LyricsCache(path).get(("netease", "1", True)) is None
+
+
+def test_expired_entries_are_ignored(tmp_path, monkeypatch):
+    path = tmp_path / "lyrics.sqlite3"
+    _set_clock(monkeypatch, 1000.0)
+    LyricsCache(path, ttl_seconds=60).set(("netease", "1", False), _lyrics())
+
+    _set_clock(monkeypatch, 1059.0)
+    assert LyricsCache(path, ttl_seconds=60).get(("netease", "1", False)) == _lyrics()
+    _set_clock(monkeypatch, 1061.0)
+    assert LyricsCache(path, ttl_seconds=60).get(("netease", "1", False)) is None
+
+
+def test_startup_prunes_to_the_newest_entries(tmp_path, monkeypatch):
+    path = tmp_path / "lyrics.sqlite3"
+    writer = LyricsCache(path)
+    for index in range(5):
+        _set_clock(monkeypatch, 1000.0 + index)
+        writer.set(("netease", str(index), False), _lyrics(str(index)))
+
+    reader = LyricsCache(path, max_entries=2)
+
+    kept = [index for index in range(5) if reader.get(("netease", str(index), False))]
+    assert kept == [3, 4]
+
+
+def test_empty_results_stay_in_memory_only(tmp_path):
+    path = tmp_path / "lyrics.sqlite3"
+    first = LyricsCache(path)
+    first.set(("netease", "1", False), _lyrics(""))
+
+    assert first.get(("netease", "1", False)) == _lyrics("")
+    assert LyricsCache(path).get(("netease", "1", False)) is None
+
+
+def test_cache_without_a_path_is_memory_only():
+    lyrics_cache = LyricsCache(None)
+    lyrics_cache.set(("qq", "1", False), _lyrics())
+
+    assert lyrics_cache.get(("qq", "1", False)) == _lyrics()
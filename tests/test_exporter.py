@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from lyricbridge.config import AppConfig
+from lyricbridge.models import Lyrics, SearchSource, Song
+from lyricbridge.services.exporter import export_songs, export_songs_async
+
+
+def _songs(count):
+    return [
+        Song(
+            source=SearchSource.NETEASE,
+            song_id=str(index),
+            display_id=str(index),
+            name=f"song{index}",
+            singers=["singer"],
+            album="album",
+            duration_ms=1000,
+        )
+        for index in range(count)
+    ]
+
+
+def _lyrics(song):
+    return Lyrics(source=SearchSource.NETEASE, original=f"[00:01.00]{song.name}")
+
+
+def test_async_export_keeps_input_order_when_lookups_finish_out_of_order(tmp_path):
+    def lookup(song):
+        time.sleep(0.01 * (5 - int(song.song_id)))
+        return _lyrics(song)
+
+    paths = asyncio.run(
+        export_songs_async(_songs(5), lookup, tmp_path, AppConfig(), lambda _: None)
+    )
+
+    assert [path.name for path in paths] == [f"song{index} - singer.lrc" for index in range(5)]
+    assert paths == export_songs(_songs(5), _lyrics, tmp_path, AppConfig(), lambda _: None)
+
+
+def test_async_export_bounds_concurrent_lookups(tmp_path):
+    lock = threading.Lock()
+    in_flight = peak = 0
+
+    def lookup(song):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+        return _lyrics(song)
+
+    asyncio.run(
+        export_songs_async(_songs(8), lookup, tmp_path, AppConfig(), lambda _: None, concurrency=2)
+    )
+
+    assert peak == 2
+
+
+def test_async_export_skips_failed_lookups(tmp_path):
+    messages = []
+
+    def lookup(song):
+        if song.song_id == "1":
+            raise OSError("timed out")
+        return None if song.song_id == "2" else _lyrics(song)
+
+    paths = asyncio.run(
+        export_songs_async(_songs(4), lookup, tmp_path, AppConfig(), messages.append)
+    )
+
+    assert [path.name for path in paths] == ["song0 - singer.lrc", "song3 - singer.lrc"]
+    assert "Skip song1: timed out" in messages
+    assert "Skip song2: lyric fetch failed" in messages
+
+
+def test_cancelled_async_export_stops_queued_lookups(tmp_path):
+    started = []
+    release = threading.Event()
+
+    def lookup(song):
+        started.append(song.song_id)
+        release.wait(1)
+        return _lyrics(song)
+
+    async def run():
+        export = export_songs_async(
+            _songs(5), lookup, tmp_path, AppConfig(), lambda _: None, concurrency=1
+        )
+        task = asyncio.create_task(export)
+        while not started:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+
+    assert started == ["0"]
+    assert not list(tmp_path.iterdir())
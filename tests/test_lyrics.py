@@ -0,0 +1,20 @@
+from lyricbridge.services.lyrics import parse_lrc_soa
+
+
+def test_parse_netease_yrc_line():
+    text = (
+        '{"t":0,"c":[{"tx":"作词: "},{"tx":"方文山"}]}\n'
+        "[16210,3460](16210,670,0)还(16880,410,0)没(17290,540,0)好(17830,1840,0)好的"
+    )
+
+    assert parse_lrc_soa(text) == ([16210], ["还没好好的"])
+
+
+def test_parse_qq_qrc_line():
+    text = "[ti:晴天]\n[17450,3930]故(17450,340)事(17790,330)的(18120,350)小(18470,400)黄花(18870,1050)"
+
+    assert parse_lrc_soa(text) == ([17450], ["故事的小黄花"])
+
+
+def test_parse_plain_lrc_keeps_angle_brackets():
+    assert parse_lrc_soa("[00:01.50]a <12,34> b") == ([1500], ["a <12,34> b"])
@@ -0,0 +1,24 @@
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("Crypto")
+
+from lyricbridge.providers.netease import NetEaseProvider
+
+
+def _provider(tracks):
+    provider = NetEaseProvider.__new__(NetEaseProvider)
+    provider._weapi_post = lambda url, payload: {"songs": tracks}
+    return provider
+
+
+def test_get_songs_lines_up_with_requested_ids():
+    provider = _provider([{"id": 5, "name": "five"}, {"id": 123, "name": "one two three"}])
+
+    songs = provider.get_songs(["0123", "404", "5"])
+
+    assert [song and song.song_id for song in songs] == ["123", None, "5"]
+
+
+def test_get_song_returns_none_for_unknown_id():
+    assert _provider([]).get_song("404") is None
@@ -0,0 +1,98 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+
+requests = pytest.importorskip("requests")
+pytest.importorskip("Crypto")
+
+from lyricbridge.providers.qq import QQMusicProvider
+
+
+def _lyric_xml(content: str) -> str:
+    return f'<?xml version="1.0" encoding="utf-8"?><QrcInfos><Lyric_1 LyricType="1" LyricContent="{content}"/></QrcInfos>'
+
+
+def test_extract_lyric_content_decodes_refs():
+    text = _lyric_xml("[0,1]a&amp;b&#x41;&#66;")
+    assert QQMusicProvider._extract_lyric_content(text) == "[0,1]a&bAB"
+
+
+@pytest.mark.parametrize("ref", ["&#0;", "&#x1F;", "&#xFFFE;", "&#x110000;", "&#99999999;"])
+def test_extract_lyric_content_rejects_illegal_char_refs(ref):
+    text = _lyric_xml(f"[0,1]a{ref}b")
+    with pytest.raises(ET.ParseError):
+        ET.fromstring(text)
+    assert QQMusicProvider._extract_lyric_content(text) == text
+
+
+@pytest.mark.parametrize("quote", ['"', "'"])
+@pytest.mark.parametrize(
+    "content",
+    [
+        "[0,1]plain",
+        "[0,1]a&amp;b &lt;c&gt; &quot;d&quot; &apos;e&apos;",
+        "[0,1]&#x6674;&#22825;",
+        "line one\r\nline two\rthree\nfour\tfive",
+        "kept&#10;newline&#13;and&#9;tab",
+        "",
+        "a & b",
+        "a &amp b",
+        "a &nbsp; b",
+        "a &#xZZ; b",
+        "a <b> c",
+        "control\x01char",
+    ],
+)
+def test_extract_lyric_content_matches_tree_parser(content, quote):
+    text = (
+        '<?xml version="1.0" encoding="utf-8"?><QrcInfos>'
+        f'<Lyric_1 LyricType="1" LyricContent={quote}{content}{quote}/></QrcInfos>'
+    )
+
+    expected = QQMusicProvider._extract_lyric_content_tree(text)
+    assert QQMusicProvider._extract_lyric_content(text) == expected
+
+
+def _qq_provider(tracks_by_req, single_songs):
+    provider = QQMusicProvider.__new__(QQMusicProvider)
+
+    def post_json(url, data):
+        if tracks_by_req is None:
+            raise requests.ConnectionError("musicu.fcg unreachable")
+        return {req: {"data": {"tracks": tracks}} for req, tracks in tracks_by_req.items()}
+
+    def get_song(song_id):
+        result = single_songs[song_id]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    provider._post_json = post_json
+    provider.get_song = get_song
+    return provider
+
+
+def _qq_song(song_id, mid):
+    return QQMusicProvider._song_from_song({"id": int(song_id), "mid": mid, "name": mid})
+
+
+def test_get_songs_falls_back_per_song_for_batch_misses():
+    provider = _qq_provider(
+        {"req_ids": [{"id": 1, "mid": "m1"}], "req_mids": [{"id": 3, "mid": "m3"}]},
+        {"2": _qq_song("2", "m2"), "m9": None},
+    )
+
+    songs = provider.get_songs(["1", "2", "m3", "m9"])
+
+    assert [song and song.display_id for song in songs] == ["m1", "m2", "m3", None]
+
+
+def test_get_songs_fallback_isolates_failing_ids():
+    provider = _qq_provider(
+        None,
+        {"1": _qq_song("1", "m1"), "2": requests.HTTPError("500"), "m3": ValueError("bad json")},
+    )
+
+    songs = provider.get_songs(["1", "2", "m3"])
+
+    assert [song and song.display_id for song in songs] == ["m1", None, None]
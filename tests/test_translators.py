@@ -0,0 +1,52 @@
+import pytest
+
+pytest.importorskip("requests")
+
+from lyricbridge.services import translators
+from lyricbridge.services.translators import BaiduTranslator, TranslatorError
+
+
+class _FakeBaidu(BaiduTranslator):
+    def __init__(self, reply=None):
+        super().__init__("app", "secret")
+        self.queries = []
+        self._reply = reply or (lambda query: [line.upper() for line in query.split("\n")])
+
+    def _translate_query(self, query, target_lang):
+        self.queries.append(query)
+        return self._reply(query)
+
+
+def test_translate_batches_lines_and_keeps_blank_slots():
+    translator = _FakeBaidu()
+
+    assert translator.translate(["one", "", "two"], "en") == ["ONE", "", "TWO"]
+    assert translator.queries == ["one\ntwo"]
+
+
+def test_translate_splits_queries_on_the_byte_limit(monkeypatch):
+    monkeypatch.setattr(translators, "BAIDU_MAX_QUERY_BYTES", 8)
+    translator = _FakeBaidu()
+
+    # "晴天" is six UTF-8 bytes, so it cannot share a query with anything else.
+    assert translator.translate(["ab", "cd", "晴天", "ef"], "en") == ["AB", "CD", "晴天", "EF"]
+    assert translator.queries == ["ab\ncd", "晴天", "ef"]
+
+
+def test_translate_falls_back_per_line_on_count_mismatch():
+    def reply(query):
+        lines = query.split("\n")
+        return ["merged"] if len(lines) > 1 else [query.upper()]
+
+    translator = _FakeBaidu(reply)
+
+    assert translator.translate(["one", "two"], "en") == ["ONE", "TWO"]
+    assert translator.queries == ["one\ntwo", "one", "two"]
+
+
+def test_translate_surfaces_request_errors():
+    def reply(query):
+        raise TranslatorError("Baidu translate request failed")
+
+    with pytest.raises(TranslatorError):
+        _FakeBaidu(reply).translate(["one"], "en")
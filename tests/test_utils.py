@@ -0,0 +1,51 @@
+import pytest
+
+pytest.importorskip("requests")
+
+from lyricbridge import utils
+from lyricbridge.models import SearchSource, SearchType
+from lyricbridge.utils import InputParseError, parse_input_ids, render_filename
+
+
+def test_fill_length_pads_with_symbol():
+    assert render_filename("$fillLength(${id},0,4)", {"id": "7"}) == "0007"
+
+
+def test_fill_length_empty_symbol_keeps_content():
+    assert render_filename("$fillLength(${id}ab,,3)", {"id": "42"}) == "42ab"
+    assert render_filename("$fillLength(${id},,5)", {"id": "42"}) == "42"
+
+
+def test_fill_length_blank_symbol_keeps_content():
+    assert render_filename("$fillLength(${id}ab, ,3)", {"id": "42"}) == "42ab"
+
+
+def _short_link(n):
+    return f"https://c6.y.qq.com/base/fcgi-bin/u?__=hop{n}"
+
+
+def test_parse_input_ids_follows_chained_short_links(monkeypatch):
+    redirects = {
+        _short_link(0): _short_link(1),
+        _short_link(1): "https://y.qq.com/n/ryqq/songDetail/0039MnYb0qxYhV",
+    }
+    calls = []
+    monkeypatch.setattr(
+        utils, "resolve_short_link", lambda url: calls.append(url) or redirects.get(url)
+    )
+
+    ids = parse_input_ids(_short_link(0), SearchSource.QQ, SearchType.SONG)
+
+    assert [(item.song_id, item.source) for item in ids] == [("0039MnYb0qxYhV", SearchSource.QQ)]
+    assert calls == [_short_link(0), _short_link(1)]
+
+
+def test_parse_input_ids_stops_at_hop_limit(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        utils, "resolve_short_link", lambda url: calls.append(url) or _short_link(len(calls))
+    )
+
+    with pytest.raises(InputParseError, match="Too many redirects"):
+        parse_input_ids(_short_link(0), SearchSource.QQ, SearchType.SONG)
+    assert len(calls) == utils.MAX_SHORT_LINK_HOPS